@@ -24,6 +24,8 @@ ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 
 # Security
 SECRET_KEY = env("SECRET_KEY")
+# Previous secret keys, still accepted for decryption while rotate_keys runs.
+SECRET_KEY_FALLBACKS = env.list("SECRET_KEY_FALLBACKS", default=[])
 SALT_KEY = env("SALT_KEY")
 AUTH_USER_MODEL = "employees.Employee"
 
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -50,6 +53,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Share of requests whose SQL queries and Fernet calls are profiled and logged,
+# see utils/profiling.py. Server-Timing headers expose the numbers to clients.
+REQUEST_PROFILING_SAMPLE_RATE = env.float(
+    "REQUEST_PROFILING_SAMPLE_RATE", default=1.0 if DEBUG else 0.01
+)
+REQUEST_PROFILING_SERVER_TIMING = env.bool("REQUEST_PROFILING_SERVER_TIMING", DEBUG)
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -83,6 +93,19 @@ DATABASES["default"].update(
     {"ATOMIC_REQUESTS": True, "CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}
 )
 
+# Cache, e.g. CACHE_URL=filecache:///var/tmp/django_cache to share it between
+# local processes
+CACHES = {"default": env.cache_url("CACHE_URL", default="locmemcache://")}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "utils.profiling": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -17,6 +17,19 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from employees import views as employee_views
+from misc import views as misc_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/employees/', employee_views.employee_list, name='api-employee-list'),
+    path(
+        'api/employees/<int:pk>/',
+        employee_views.employee_detail,
+        name='api-employee-detail',
+    ),
+    path(
+        'api/geographies/', employee_views.geography_list, name='api-geography-list'
+    ),
+    path('api/cities/', misc_views.city_list, name='api-city-list'),
 ]
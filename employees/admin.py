@@ -1,23 +1,27 @@
 # -*- coding: utf-8 -*-
+import re
+
 from django.contrib import admin
 
+from utils.helpers import ModelAdmin
+
 from .models import Status, Geography, Employee
 
 
 @admin.register(Status)
-class StatusAdmin(admin.ModelAdmin):
+class StatusAdmin(ModelAdmin):
     list_display = ("id", "name")
     search_fields = ("name",)
 
 
 @admin.register(Geography)
-class GeographyAdmin(admin.ModelAdmin):
+class GeographyAdmin(ModelAdmin):
     list_display = ("id", "name", "timezone")
     search_fields = ("name",)
 
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(ModelAdmin):
     # Minimal list display - just what you need to identify and browse employees
     list_display = (
         "email",
@@ -36,12 +40,13 @@ class EmployeeAdmin(admin.ModelAdmin):
         "date_hired",
     )
 
+    # On PostgreSQL these icontains lookups are served by the trigram indexes
+    # of employees migration 0011. Phone numbers are searched by digits in
+    # get_search_results().
     search_fields = (
         "first_name",
         "last_name",
         "email",
-        "sin",
-        "phone_number",
     )
 
     # Organize fields into logical sections in the detail view
@@ -146,3 +151,29 @@ class EmployeeAdmin(admin.ModelAdmin):
     raw_id_fields = ("geography", "city", "status", "emergency_relationship")
 
     ordering = ("-date_hired",)
+
+    # Setting select_related in get_queryset() would turn off the changelist's
+    # own join of the list_display foreign keys.
+    list_select_related = ("status",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_active()
+
+    @admin.display(description="active", boolean=True, ordering="active")
+    def is_active(self, obj):
+        return obj.active
+
+    def get_search_results(self, request, queryset, search_term):
+        # SINs are matched exactly through the blind index instead of a
+        # substring scan over the plaintext column.
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term:
+            results |= queryset.filter_by_sin(search_term)
+        # Anything that looks like (part of) a phone number, at least three
+        # digits and separators only, is matched ignoring formatting.
+        digits = re.sub(r"\D", "", search_term)
+        if len(digits) >= 3 and re.fullmatch(r"[\d\s().+-]+", search_term.strip()):
+            results |= queryset.filter_by_phone(digits)
+        return results, may_have_duplicates
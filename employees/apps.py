@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class EmployeesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'employees'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from utils.keys import warm_up
+        from utils.reference import reference_data
+
+        from . import cache
+
+        warm_up()
+        reference_data.register(self.get_model('Status'), 'name')
+        reference_data.register(self.get_model('Geography'), 'name')
+
+        for signal in (post_save, post_delete):
+            signal.connect(cache.employee_changed, 'employees.Employee')
+            for model in ('employees.Status', 'employees.Geography', 'misc.City',
+                          'misc.Province', 'misc.Relationship'):
+                signal.connect(cache.reference_data_changed, model)
@@ -0,0 +1,125 @@
+"""
+Cache of compact per-employee records, on Django's cache framework.
+
+Records are keyed by pk under a shared version number. Saving or deleting
+an employee drops its record; bulk writes that bypass save() (imports, SIN
+encryption and key rotation, QuerySet.update()) call invalidate_all(), which
+bumps the version so every record is rebuilt on its next lookup. SINs are
+only ever cached encrypted.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from utils.crypto import bulk_decrypt
+
+from .models import Employee
+
+KEY_PREFIX = "employee-record"
+VERSION_KEY = "%s:version" % KEY_PREFIX
+TIMEOUT = 24 * 60 * 60
+
+
+def version():
+    # Start from the clock rather than 1 so that a version key evicted from
+    # the cache never brings back records of an older version.
+    cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+    return cache.get(VERSION_KEY)
+
+
+def record_key(pk, version):
+    return "%s:%s:%s" % (KEY_PREFIX, version, pk)
+
+
+def build_record(employee):
+    token = employee.__dict__["sin_e"]
+    return {
+        "id": employee.pk,
+        "email": employee.email,
+        "first_name": employee.first_name,
+        "middle_name": employee.middle_name,
+        "last_name": employee.last_name,
+        "full_name": employee.full_name(),
+        "full_address": employee.full_address(),
+        "phone_number": employee.phone_number,
+        "extra_phone_number": employee.extra_phone_number,
+        "city_id": employee.city_id,
+        "city": str(employee.city),
+        "geography_id": employee.geography_id,
+        "status_id": employee.status_id,
+        "status": employee.status.name,
+        "active": employee.is_active(),
+        "date_hired": employee.date_hired,
+        "date_released": employee.date_released,
+        "color": employee.color,
+        "modified": employee.modified,
+        # The stored token, decrypted by with_sins() for callers allowed to.
+        "sin_e": str(token) if token is not None else None,
+    }
+
+
+def get_records(pks):
+    """
+    {pk: record} for the employees in `pks` that exist. Cached records come
+    from one get_many(); the others are built with one query and stored
+    with one set_many().
+    """
+    current = version()
+    keys = {record_key(pk, current): pk for pk in pks}
+    found = cache.get_many(keys)
+    records = {keys[key]: record for key, record in found.items()}
+    missing = [pk for pk in keys.values() if pk not in records]
+    if missing:
+        employees = Employee.all_objects.filter(pk__in=missing).select_related(
+            "city__province", "status"
+        )
+        built = {employee.pk: build_record(employee) for employee in employees}
+        cache.set_many(
+            {record_key(pk, current): record for pk, record in built.items()},
+            timeout=TIMEOUT,
+        )
+        records.update(built)
+    return records
+
+
+def get_record(pk):
+    return get_records([pk]).get(pk)
+
+
+def with_sins(records):
+    """
+    Copies of `records` with their SIN decrypted, in one batch.
+    """
+    records = list(records)
+    sins = bulk_decrypt([record["sin_e"] for record in records])
+    return [{**record, "sin": sin} for record, sin in zip(records, sins)]
+
+
+def invalidate(pk):
+    cache.delete(record_key(pk, version()))
+
+
+def invalidate_all():
+    version()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted between the two calls
+        version()
+
+
+def employee_changed(sender, instance, **kwargs):
+    # Deleting sets instance.pk to None before the transaction commits.
+    pk = instance.pk
+    invalidate(pk)
+    # Drop it again once committed, in case it was rebuilt from the old row
+    # in between.
+    transaction.on_commit(lambda: invalidate(pk))
+
+
+def reference_data_changed(sender, **kwargs):
+    # Records embed status names and city labels.
+    invalidate_all()
+    transaction.on_commit(invalidate_all)
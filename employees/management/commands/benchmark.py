@@ -0,0 +1,297 @@
+# employees/management/commands/benchmark.py
+import csv
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib import admin
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    teardown_databases,
+)
+from django.utils import timezone
+
+from employees import cache as employee_cache
+from employees.models import Employee, Geography, Status
+from misc.models import City, Province, Relationship
+from utils.keys import get_fernet
+from utils.reference import reference_data
+
+# Reference tables and the CSV files at the project root they are loaded from.
+REFERENCE_DATA = (
+    (Province, "misc_province.csv"),
+    (City, "misc_city.csv"),
+    (Relationship, "misc_relationship.csv"),
+    (Status, "company_status.csv"),
+    (Geography, "employees_geography.csv"),
+)
+
+BENCHMARKS = ("crypto", "import", "encrypt_sin", "export", "changelist", "next_id")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the crypto, import, export and admin hot paths on a "
+        "throwaway test database, at one or more table sizes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1000],
+            help="Numbers of employees to benchmark with, e.g. 1000 100000 "
+            "1000000 (default: 1000)",
+        )
+        parser.add_argument(
+            "--only",
+            choices=BENCHMARKS,
+            nargs="+",
+            help="Benchmarks to run (default: all)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs per latency measurement, the best is kept (default: 5)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Concurrent callers for the next_id benchmark (default: 8)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON results to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs, like test --keepdb",
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        self.threads = options["threads"]
+        self.verbosity = options["verbosity"]
+        only = options["only"] or BENCHMARKS
+        self.results = []
+
+        # Same database setup as the test runner: real data is never touched.
+        old_config = setup_databases(
+            self.verbosity, interactive=False, keepdb=options["keepdb"]
+        )
+        reference_data.invalidate()
+        employee_cache.invalidate_all()
+        try:
+            self.load_reference_data()
+            if "crypto" in only:
+                self.bench_crypto()
+            with tempfile.TemporaryDirectory() as tmp:
+                for size in options["sizes"]:
+                    self.run_size(size, only, Path(tmp))
+        finally:
+            teardown_databases(old_config, self.verbosity, keepdb=options["keepdb"])
+
+        document = {
+            "timestamp": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "platform": platform.platform(),
+            },
+            "results": self.results,
+        }
+        output = json.dumps(document, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def record(self, benchmark, metric, value, unit, size=None, **extra):
+        self.results.append(
+            {
+                "benchmark": benchmark,
+                "metric": metric,
+                "size": size,
+                "value": round(value, 3),
+                "unit": unit,
+                **extra,
+            }
+        )
+        # Progress goes to stderr, stdout may be the JSON document.
+        label = f"{benchmark} {metric}" + (f" @ {size}" if size else "")
+        self.stderr.write(f"{label}: {value:.3f} {unit}")
+
+    def best_of(self, function):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def timed(self, function):
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
+
+    def load_reference_data(self):
+        for model, filename in REFERENCE_DATA:
+            with open(settings.BASE_DIR / filename, encoding="utf-8-sig") as f:
+                rows = list(csv.DictReader(f))
+            model.objects.bulk_create(
+                [model(**row) for row in rows], ignore_conflicts=True
+            )
+        reference_data.invalidate()
+
+    def seed_employees(self, size):
+        """
+        Replace the employees with `size` synthetic ones.
+        """
+        Employee.all_objects.all().delete()
+        call_command(
+            "generate_employees",
+            count=size,
+            # SQLite's test database lives in this process' memory.
+            workers=1 if connection.vendor == "sqlite" else os.cpu_count(),
+            stdout=io.StringIO(),
+        )
+
+    def run_size(self, size, only, tmp):
+        self.stderr.write(f"Seeding {size} employees")
+        self.seed_employees(size)
+        out = io.StringIO()
+        csv_path = tmp / f"employees-{size}.csv"
+
+        # The export is also the input of the import benchmark.
+        elapsed = self.timed(
+            lambda: call_command(
+                "export_employees", str(csv_path), stdout=out, stderr=out
+            )
+        )
+        if "export" in only:
+            self.record(
+                "export_employees", "throughput", size / elapsed, "rows/s", size
+            )
+
+        if "import" in only:
+            Employee.all_objects.all().delete()
+            elapsed = self.timed(
+                lambda: call_command(
+                    "populate_employees",
+                    str(csv_path),
+                    bulk=True,
+                    batch_size=2000,
+                    stdout=out,
+                    stderr=out,
+                )
+            )
+            self.record(
+                "populate_employees", "throughput", size / elapsed, "rows/s", size
+            )
+            if connection.vendor == "postgresql":
+                elapsed = self.timed(
+                    lambda: call_command(
+                        "populate_employees",
+                        str(csv_path),
+                        copy=True,
+                        stdout=out,
+                        stderr=out,
+                    )
+                )
+                self.record(
+                    "populate_employees --copy",
+                    "throughput",
+                    size / elapsed,
+                    "rows/s",
+                    size,
+                )
+
+        if "encrypt_sin" in only:
+            checkpoint = tmp / "encrypt_sin.checkpoint"
+            elapsed = self.timed(
+                lambda: call_command(
+                    "encrypt_sin",
+                    force=True,
+                    batch_size=2000,
+                    checkpoint_file=str(checkpoint),
+                    stdout=out,
+                    stderr=out,
+                )
+            )
+            self.record("encrypt_sin", "throughput", size / elapsed, "rows/s", size)
+
+        if "changelist" in only:
+            self.bench_changelist(size)
+        if "next_id" in only:
+            self.bench_next_id(size)
+
+    def bench_crypto(self, count=10000):
+        fernet = get_fernet()
+        values = [b"%09d" % i for i in range(count)]
+        tokens = []
+        elapsed = self.timed(lambda: tokens.extend(map(fernet.encrypt, values)))
+        self.record("fernet", "encrypt", elapsed / count * 1e6, "us/value")
+        elapsed = self.timed(lambda: list(map(fernet.decrypt, tokens)))
+        self.record("fernet", "decrypt", elapsed / count * 1e6, "us/value")
+
+    def bench_changelist(self, size):
+        model_admin = admin.site._registry[Employee]
+        user = Employee(is_staff=True, is_superuser=True)
+        for name, params in (
+            ("changelist", {}),
+            ("changelist search", {"q": "MacDonald"}),
+            ("changelist filtered", {"status__id__exact": Status.FULLTIME_ID}),
+        ):
+            request = RequestFactory().get("/admin/employees/employee/", params)
+            request.user = user
+
+            def render():
+                model_admin.changelist_view(request).render()
+
+            with CaptureQueriesContext(connection) as queries:
+                render()
+            elapsed = self.best_of(render)
+            self.record(
+                name, "latency", elapsed * 1000, "ms", size, queries=len(queries)
+            )
+
+    def bench_next_id(self, size, per_thread=200):
+        def allocate(_):
+            try:
+                return [Employee.next_iss_iat_id() for _ in range(per_thread)]
+            finally:
+                connections.close_all()
+
+        ids = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for chunk in executor.map(allocate, range(self.threads)):
+                ids.extend(chunk)
+        elapsed = time.perf_counter() - started
+        duplicates = len(ids) - len(set(ids))
+        self.record(
+            "next_id",
+            "throughput",
+            len(ids) / elapsed,
+            "ids/s",
+            size,
+            threads=self.threads,
+            duplicates=duplicates,
+        )
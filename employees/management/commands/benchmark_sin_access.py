@@ -0,0 +1,72 @@
+# employees/management/commands/benchmark_sin_access.py
+import time
+from contextlib import contextmanager
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from encrypted_fields.fields import EncryptedCharField
+
+from employees.models import Employee
+
+
+@contextmanager
+def eager_decryption():
+    """
+    Make sin_e decrypt in from_db_value again, like the plain
+    EncryptedCharField it replaced.
+    """
+    field = Employee._meta.get_field("sin_e")
+    field.from_db_value = EncryptedCharField.from_db_value.__get__(field)
+    try:
+        yield
+    finally:
+        del field.from_db_value
+
+
+class Command(BaseCommand):
+    help = "Compare eager and lazy sin_e decryption on common read paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs per measurement, the best is kept (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        rows = Employee.all_objects.count()
+        self.stdout.write(f"Employees: {rows}\n")
+
+        benchmarks = [
+            ("Bulk iteration", self.iterate),
+            ("Admin changelist", self.changelist),
+        ]
+        for name, benchmark in benchmarks:
+            with eager_decryption():
+                before = self.best_of(benchmark, repeat)
+            after = self.best_of(benchmark, repeat)
+            self.stdout.write(
+                f"{name}: eager {before * 1000:.1f}ms, lazy {after * 1000:.1f}ms "
+                f"({before / after:.1f}x)"
+            )
+
+    def best_of(self, benchmark, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            benchmark()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def iterate(self):
+        for employee in Employee.all_objects.iterator(chunk_size=2000):
+            employee.email
+
+    def changelist(self):
+        model_admin = admin.site._registry[Employee]
+        request = RequestFactory().get("/admin/employees/employee/")
+        request.user = Employee(is_staff=True, is_superuser=True)
+        model_admin.changelist_view(request).render()
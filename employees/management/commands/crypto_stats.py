@@ -0,0 +1,99 @@
+# employees/management/commands/crypto_stats.py
+import argparse
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from utils import crypto_hooks, keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Show this process' Fernet encrypt/decrypt and key derivation stats, "
+        "optionally after running another command, e.g. "
+        "crypto_stats encrypt_sin --workers 4"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "command",
+            nargs=argparse.REMAINDER,
+            help="Command, with its arguments, to run before showing the stats",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output the stats and histograms as JSON",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Only count the operations of the command, not the warm-up",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            crypto_hooks.stats.reset()
+        if options["command"]:
+            name, *command_args = options["command"]
+            # The command's own output stays on stdout, ahead of the stats.
+            call_command(name, *command_args, stdout=self.stdout, stderr=self.stderr)
+
+        rows = crypto_hooks.stats.snapshot()
+        if options["json"]:
+            document = {
+                "buckets": [str(bound) for bound in crypto_hooks.BUCKETS],
+                "stats": rows,
+                "warm_up_seconds": keys.metrics["warm_up_seconds"],
+            }
+            self.stdout.write(json.dumps(document, indent=2))
+            return
+
+        if not rows:
+            self.stdout.write("No Fernet operations recorded")
+            return
+        header = (
+            "operation",
+            "field",
+            "count",
+            "errors",
+            "total s",
+            "mean us",
+            "p50 us",
+            "p95 us",
+            "p99 us",
+            "max us",
+        )
+        lines = [header]
+        for row in rows:
+            lines.append(
+                (
+                    row["operation"],
+                    row["field"] or "-",
+                    str(row["count"]),
+                    str(row["errors"]),
+                    "%.3f" % row["seconds"],
+                    "%.1f" % (row["seconds"] / row["count"] * 1e6),
+                    *(
+                        "%.1f" % (crypto_hooks.percentile(row, q) * 1e6)
+                        for q in (0.5, 0.95, 0.99)
+                    ),
+                    "%.1f" % (row["max_seconds"] * 1e6),
+                )
+            )
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        for line in lines:
+            self.stdout.write(
+                "  ".join(
+                    value.ljust(width) if i < 2 else value.rjust(width)
+                    for i, (value, width) in enumerate(zip(line, widths))
+                )
+            )
+        if keys.metrics["warm_up_seconds"] is not None:
+            self.stdout.write("Key warm-up: %.3fs" % keys.metrics["warm_up_seconds"])
+        self.stdout.write(
+            "Percentiles are histogram bucket upper bounds: "
+            + ", ".join("%g" % (bound * 1e6) for bound in crypto_hooks.BUCKETS[:-1])
+            + " us"
+        )
@@ -1,11 +1,24 @@
 # employees/management/commands/encrypt_sin.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connections, transaction
 
+from employees import cache as employee_cache
 from employees.models import Employee
-
-
-class Command(BaseCommand):
+from utils import crypto_hooks
+from utils.crypto import (
+    encrypt_rows,
+    init_worker,
+    pool_encrypt_rows,
+    update_ciphertext,
+)
+from utils.helpers import BatchCommandMixin, Checkpoint, Throttle, keyset_paginate
+from utils.keys import get_blind_index_key, get_keys
+
+
+class Command(BatchCommandMixin, BaseCommand):
     help = "Migrate SIN data from sin field to sin_e field"
 
     def add_arguments(self, parser):
@@ -28,12 +41,44 @@ class Command(BaseCommand):
             action="store_true",
             help="Show detailed output for each record",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes doing the encryption. Above 1 batches "
+                "are encrypted in a process pool while the next ones are "
+                "read (default: 1)"
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint-file",
+            default=".encrypt_sin.checkpoint",
+            help=(
+                "File recording the last committed pk "
+                "(default: .encrypt_sin.checkpoint)"
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue after the pk recorded in the checkpoint file",
+        )
+        parser.add_argument(
+            "--max-rows-per-second",
+            type=int,
+            default=0,
+            help="Throttle the migration to this many rows per second (default: off)",
+        )
 
     def handle(self, *args, **options):
         batch_size = options["batch_size"]
         dry_run = options["dry_run"]
         force = options["force"]
         verbose = options["verbose"]
+        workers = options["workers"]
+        checkpoint = Checkpoint(options["checkpoint_file"])
+        throttle = Throttle(options["max_rows_per_second"])
 
         if dry_run:
             self.stdout.write(
@@ -74,6 +119,11 @@ class Command(BaseCommand):
                 sin_e=""
             )
 
+        after = checkpoint.load() if options["resume"] else None
+        if after is not None:
+            self.stdout.write(f"Resuming after ID {after}")
+            queryset = queryset.filter(pk__gt=after)
+
         total = queryset.count()
         self.stdout.write(f"Records to migrate: {total}\n")
 
@@ -82,61 +132,99 @@ class Command(BaseCommand):
             return
 
         migrated = 0
-        skipped = 0
         errors = 0
-
-        # Process in batches
-        for obj in queryset.iterator(chunk_size=batch_size):
-            # Skip if already encrypted (unless force)
-            if not force and obj.sin_e and obj.sin_e != "":
-                skipped += 1
-                if verbose:
-                    self.stdout.write(f"Skipped ID {obj.pk}: already encrypted")
-                continue
+        processed = 0
+
+        for rows, results in self.encrypted_batches(queryset, batch_size, workers):
+            tokens = {}
+            indexes = {}
+            for pk, token, index, error in results:
+                if error is None:
+                    tokens[pk] = token
+                    indexes[pk] = index
+                else:
+                    errors += 1
+                    self.stdout.write(
+                        self.style.ERROR(f"  ✗ Error migrating ID {pk}: {error}")
+                    )
 
             if verbose:
-                self.stdout.write(
-                    f'Processing ID {obj.pk}: sin="{obj.sin}" (len={len(obj.sin)})'
-                )
+                for pk, sin in rows:
+                    self.stdout.write(
+                        f'Processing ID {pk}: sin="{sin}" (len={len(sin)})'
+                    )
 
             if not dry_run:
+                # One short transaction per batch: nothing holds locks for
+                # longer than a single UPDATE.
                 try:
                     with transaction.atomic():
-                        obj.sin_e = obj.sin
-                        obj.save(update_fields=["sin_e"])
-                    migrated += 1
-
-                    if verbose:
-                        # Refresh to see encrypted value
-                        obj.refresh_from_db()
+                        update_ciphertext(queryset, "sin_e", tokens, sin_bidx=indexes)
+                    employee_cache.invalidate_all()
+                except Exception as e:
+                    errors += len(tokens)
+                    for pk in tokens:
                         self.stdout.write(
-                            self.style.SUCCESS(f"  ✓ Migrated ID {obj.pk}")
+                            self.style.ERROR(f"  ✗ Error migrating ID {pk}: {str(e)}")
                         )
-                except Exception as e:
-                    errors += 1
-                    self.stdout.write(
-                        self.style.ERROR(f"  ✗ Error migrating ID {obj.pk}: {str(e)}")
-                    )
-            else:
-                migrated += 1
+                    tokens = {}
+                    self.batch_failed(checkpoint)
+                checkpoint.commit(rows[-1][0])
+
+            migrated += len(tokens)
+            if verbose:
+                for pk in tokens:
+                    self.stdout.write(self.style.SUCCESS(f"  ✓ Migrated ID {pk}"))
 
             # Progress update every batch
-            if (migrated + skipped) % batch_size == 0:
-                self.stdout.write(
-                    f"Progress: {migrated + skipped}/{total} records processed"
-                )
-
-        # Summary
-        self.stdout.write("\n" + "=" * 30)
-        self.stdout.write(self.style.SUCCESS("Migration complete!"))
-        self.stdout.write(f"Migrated: {migrated}")
-        self.stdout.write(f"Skipped: {skipped}")
-        self.stdout.write(f"Errors: {errors}")
-        self.stdout.write("=" * 30)
+            processed += len(rows)
+            self.stdout.write(f"Progress: {processed}/{total} records processed")
+            throttle(len(rows))
+
+        self.print_summary(
+            "Migration complete!",
+            {"Migrated": migrated, "Errors": errors},
+            dry_run,
+        )
 
-        if dry_run:
-            self.stdout.write(
-                self.style.WARNING(
-                    "\nThis was a dry run. Run without --dry-run to apply changes."
-                )
-            )
+    def encrypted_batches(self, queryset, batch_size, workers):
+        """
+        Yield (rows, results) for every keyset page of `queryset`, in pk
+        order. With more than one worker the pages are encrypted in a
+        process pool while the following pages are read.
+        """
+        keys = get_keys()
+        index_key = get_blind_index_key()
+        field = Employee._meta.get_field("sin_e")
+        pages = keyset_paginate(queryset, batch_size, "sin")
+
+        if workers <= 1:
+            fernet = field.f
+            for rows in pages:
+                yield rows, encrypt_rows(rows, fernet, index_key)
+            return
+
+        # Don't let the forked workers inherit an open database connection.
+        connections.close_all()
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(keys, index_key, str(field)),
+        ) as executor:
+            # Results are consumed in submission order so the checkpoint
+            # only ever moves forward.
+            pending = deque()
+            for rows in pages:
+                pending.append((rows, executor.submit(pool_encrypt_rows, rows)))
+                if len(pending) >= workers * 2:
+                    rows, future = pending.popleft()
+                    yield rows, self.merge_stats(future.result())
+            while pending:
+                rows, future = pending.popleft()
+                yield rows, self.merge_stats(future.result())
+
+    def merge_stats(self, result):
+        results, worker_stats = result
+        crypto_hooks.stats.merge(worker_stats)
+        return results
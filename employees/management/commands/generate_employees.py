@@ -0,0 +1,203 @@
+# employees/management/commands/generate_employees.py
+import csv
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from employees import cache as employee_cache
+from employees.management.commands.export_employees import COLUMNS
+from employees.models import Employee, Geography
+from employees.synthetic import Reference, generate, has_iss_iat_id, has_mss_id
+from misc.models import City, Relationship
+from utils.reference import reference_data
+
+
+def insert_chunk(plaintext_sin, *args):
+    """
+    Generate and bulk_create one chunk, in a pool worker or inline.
+    """
+    employees = []
+    for data in generate(*args):
+        # Encrypted by the field as it is inserted.
+        data["sin_e"] = data["sin"]
+        if not plaintext_sin:
+            data["sin"] = ""
+        employees.append(Employee(password="", **data))
+    Employee.bulk_apply_invariants(employees)
+    Employee.all_objects.bulk_create(employees)
+    return len(employees)
+
+
+def csv_chunk(*args):
+    """
+    Generate one chunk as CSV rows in the employees_employee.csv layout.
+    """
+    return [
+        ["" if data.get(column) is None else data[column] for column in COLUMNS]
+        for data in generate(*args)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic employees for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            required=True,
+            help="Number of employees to generate",
+        )
+        parser.add_argument(
+            "--csv",
+            help="Write the employees to this CSV file, in the "
+            "employees_employee.csv layout, instead of the database. Needs "
+            "no database",
+        )
+        parser.add_argument(
+            "--start-id",
+            type=int,
+            default=1,
+            help="With --csv, first iss_iat_id and mss_id to number the "
+            "employees from, e.g. above the ids of the database the file "
+            "will be imported into (default: 1)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes, 1 generates in process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Employees per worker task and bulk_create (default: 5000)",
+        )
+        parser.add_argument(
+            "--seed",
+            default="0",
+            help="Random seed, the same seed generates the same employees "
+            "(default: 0)",
+        )
+        parser.add_argument(
+            "--tag",
+            help="Text put in every email to keep them unique across runs "
+            "(default: random)",
+        )
+        parser.add_argument(
+            "--no-plaintext-sin",
+            action="store_true",
+            help="Only store the encrypted SIN, leaving the plaintext column empty",
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        csv_path = options["csv"]
+        tag = options["tag"] or secrets.token_hex(3)
+
+        reference = self.load_reference(from_files=bool(csv_path))
+
+        # Unique ids are handed out to the chunks in order: numbered from
+        # --start-id for a CSV, else reserved up front from the
+        # sequence-backed allocator.
+        iss_iat_count = sum(map(has_iss_iat_id, range(count)))
+        mss_count = sum(map(has_mss_id, range(count)))
+        if csv_path:
+            start_id = options["start_id"]
+            iss_iat_ids = iter(range(start_id, start_id + iss_iat_count))
+            mss_ids = iter(range(start_id, start_id + mss_count))
+        else:
+            iss_iat_ids = iter(Employee.reserve_iss_iat_ids(iss_iat_count))
+            mss_ids = iter(Employee.reserve_mss_ids(mss_count))
+        tasks = []
+        for start in range(0, count, batch_size):
+            numbers = range(start, min(start + batch_size, count))
+            tasks.append(
+                (
+                    start,
+                    len(numbers),
+                    options["seed"],
+                    reference,
+                    tag,
+                    [next(iss_iat_ids) for n in numbers if has_iss_iat_id(n)],
+                    [next(mss_ids) for n in numbers if has_mss_id(n)],
+                )
+            )
+
+        start_time = time.time()
+        if csv_path:
+            with open(csv_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+                writer.writerow(COLUMNS)
+                for rows in self.run(csv_chunk, tasks, workers):
+                    writer.writerows(rows)
+        else:
+            plaintext_sin = not options["no_plaintext_sin"]
+            tasks = [(plaintext_sin, *task) for task in tasks]
+            for created in self.run(insert_chunk, tasks, workers):
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Inserted {created} employees")
+            employee_cache.invalidate_all()
+
+        elapsed = time.time() - start_time
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {count} employees in {elapsed:.1f}s ({rate:.0f} rows/s)"
+            )
+        )
+
+    def run(self, function, tasks, workers):
+        """
+        Yield the results of `function` over `tasks`, in order.
+        """
+        if workers <= 1:
+            for task in tasks:
+                yield function(*task)
+            return
+        # Forked workers must not share the parent's database connection.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            yield from pool.map(function, *zip(*tasks))
+
+    def load_reference(self, from_files):
+        """
+        The cities, relationships and geographies to point to: from the
+        reference CSV files when writing a CSV, else from the database.
+        """
+        if not from_files:
+            return Reference(
+                cities=[
+                    (city.pk, city.cached_province().abbreviation)
+                    for city in reference_data.all(City)
+                ],
+                relationship_ids=[r.pk for r in reference_data.all(Relationship)],
+                geographies={g.name: g.pk for g in reference_data.all(Geography)},
+            )
+
+        def read(filename):
+            with open(settings.BASE_DIR / filename, encoding="utf-8-sig") as f:
+                return list(csv.DictReader(f))
+
+        provinces = {
+            row["id"]: row["abbreviation"] for row in read("misc_province.csv")
+        }
+        return Reference(
+            cities=[
+                (int(row["id"]), provinces[row["province_id"]])
+                for row in read("misc_city.csv")
+            ],
+            relationship_ids=[int(row["id"]) for row in read("misc_relationship.csv")],
+            geographies={
+                row["name"]: int(row["id"]) for row in read("employees_geography.csv")
+            },
+        )
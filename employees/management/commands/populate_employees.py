@@ -1,10 +1,123 @@
 import csv
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
-from employees.models import Employee, City, Relationship
+from employees import cache as employee_cache
+from employees.models import (
+    DEFAULT_GEOGRAPHY_NAME,
+    Employee,
+    City,
+    Geography,
+    Relationship,
+    Status,
+)
+from utils.crypto import encrypt_rows
+from utils.fields import Ciphertext
+from utils.keys import get_blind_index_key
+from utils.reference import reference_data
 from datetime import datetime
 
+# Employee fields --copy stages and merges, in COPY column order.
+COPY_FIELDS = (
+    "email",
+    "first_name",
+    "last_name",
+    "middle_name",
+    "sin",
+    "sin_e",
+    "sin_bidx",
+    "address",
+    "address2",
+    "postal_code",
+    "phone_number",
+    "extra_phone_number",
+    "emergency_phone_number",
+    "emergency_contact_name",
+    "notes",
+    "color",
+    "date_of_birth",
+    "date_hired",
+    "date_released",
+    "iss_iat_id",
+    "mss_id",
+    "iss_security_license_number",
+    "iat_security_license_number",
+    "mss_security_license_number",
+    "weekly_hours",
+    "salary",
+    "city",
+    "status",
+    "geography",
+    "emergency_relationship",
+    "modified",
+)
+
+
+class RejectsFile:
+    """
+    CSV of the rows an import could not load: the original columns plus the
+    row number and the reason. The file is only created on the first reject.
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = [*fieldnames, "row", "error"]
+        self.count = 0
+        self.file = None
+        self.writer = None
+
+    def write(self, row_num, row, error):
+        if self.writer is None:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+            self.writer.writeheader()
+        self.writer.writerow({**row, "row": row_num, "error": str(error)})
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class CSVStream(io.TextIOBase):
+    """
+    Read-only file object that renders `rows` as CSV on demand, so COPY
+    consumes the rows while they are still being parsed. None becomes an
+    unquoted empty field, which COPY reads as NULL, while empty strings are
+    quoted and stay empty strings.
+    """
+
+    class _Lines(list):
+        write = list.append
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.lines = self._Lines()
+        self.writer = csv.writer(self.lines, quoting=csv.QUOTE_NOTNULL)
+        self.buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(row)
+            self.buffer += "".join(self.lines)
+            self.lines.clear()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
 
 class Command(BaseCommand):
     help = "Populate Employee table from employees_employee.csv"
@@ -17,9 +130,63 @@ class Command(BaseCommand):
             default="employees_employee.csv",
             help="Path to the CSV file (default: employees_employee.csv)",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help=(
+                "Stream the file in batches, upserting and committing every "
+                "batch on its own instead of one update_or_create per row in "
+                "a single transaction"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows per bulk upsert and commit (default: 500)",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help=(
+                "PostgreSQL only: stream the file with COPY into an unlogged "
+                "staging table and merge it with one INSERT ... ON CONFLICT"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help=(
+                "Threads encrypting SINs for --bulk and --copy while the "
+                "previous batch is written (default: 2)"
+            ),
+        )
+        parser.add_argument(
+            "--no-plaintext-sin",
+            action="store_true",
+            help="Only store the encrypted SIN, leaving the plaintext column empty",
+        )
+        parser.add_argument(
+            "--rejects",
+            help=(
+                "Where --bulk and --copy write the rows they could not import "
+                "(default: <csv_file>.rejects.csv)"
+            ),
+        )
 
     def handle(self, *args, **options):
         csv_file = options["csv_file"]
+        self.verbosity = options["verbosity"]
+        self.workers = options["workers"]
+        self.plaintext_sin = not options["no_plaintext_sin"]
+        # {model: {pk, ...}} foreign keys are checked against instead of the
+        # reference data cache, see import_copy().
+        self.reference_ids = None
+
+        if options["copy"] and connection.vendor != "postgresql":
+            self.stdout.write(self.style.ERROR("--copy requires PostgreSQL"))
+            return
 
         try:
             with open(csv_file, "r", encoding="utf-8-sig") as file:
@@ -28,69 +195,438 @@ class Command(BaseCommand):
                 # Strip whitespace from headers
                 reader.fieldnames = [name.strip() for name in reader.fieldnames]
 
-                created_count = 0
-                updated_count = 0
-                skipped_count = 0
-                error_count = 0
-
-                with transaction.atomic():
-                    for row_num, row in enumerate(reader, start=2):
-                        # Strip whitespace from all values
-                        row = {k: v.strip() if v else v for k, v in row.items()}
-
-                        # Skip if no email present
-                        email = row.get("email", "").strip()
-                        if not email:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"Row {row_num}: Skipped - no email provided"
-                                )
-                            )
-                            skipped_count += 1
-                            continue
-
-                        try:
-                            employee_data = self.parse_row(row)
-
-                            # Check if employee exists
-                            employee, created = Employee.objects.update_or_create(
-                                email=email, defaults=employee_data
-                            )
-
-                            if created:
-                                created_count += 1
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f"Row {row_num}: Created employee {email}"
-                                    )
-                                )
-                            else:
-                                updated_count += 1
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f"Row {row_num}: Updated employee {email}"
-                                    )
-                                )
-
-                        except Exception as e:
-                            error_count += 1
-                            self.stdout.write(
-                                self.style.ERROR(
-                                    f"Row {row_num}: Error processing {email}: {str(e)}"
-                                )
+                started = time.monotonic()
+                if options["bulk"] or options["copy"]:
+                    rejects = RejectsFile(
+                        options["rejects"]
+                        or "%s.rejects.csv" % os.path.splitext(csv_file)[0],
+                        reader.fieldnames,
+                    )
+                    try:
+                        if options["copy"]:
+                            counts = self.import_copy(reader, rejects)
+                        else:
+                            counts = self.import_bulk(
+                                reader, options["batch_size"], rejects
                             )
+                    finally:
+                        rejects.close()
+                    created_count, updated_count, skipped_count, error_count = counts
+                else:
+                    rejects = None
+                    with transaction.atomic():
+                        created_count, updated_count, skipped_count, error_count = (
+                            self.import_rows(reader)
+                        )
+                # Imported ids were written without the id allocator.
+                if created_count or updated_count:
+                    Employee.sync_id_allocators()
+                elapsed = time.monotonic() - started
+                total = created_count + updated_count + skipped_count + error_count
 
                 self.stdout.write(self.style.SUCCESS(f"\n=== Summary ==="))
                 self.stdout.write(self.style.SUCCESS(f"Created: {created_count}"))
                 self.stdout.write(self.style.SUCCESS(f"Updated: {updated_count}"))
                 self.stdout.write(self.style.WARNING(f"Skipped: {skipped_count}"))
                 self.stdout.write(self.style.ERROR(f"Errors: {error_count}"))
+                self.stdout.write(
+                    f"Elapsed: {elapsed:.1f}s "
+                    f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+                )
+                if rejects and rejects.count:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"{rejects.count} rejected rows written to {rejects.path}"
+                        )
+                    )
 
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f"File not found: {csv_file}"))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error reading CSV file: {str(e)}"))
 
+    def import_rows(self, reader):
+        """
+        Upsert the CSV one row at a time with update_or_create.
+        """
+        created_count = 0
+        updated_count = 0
+        skipped_count = 0
+        error_count = 0
+
+        for row_num, row in enumerate(reader, start=2):
+            # Strip whitespace from all values
+            row = {k: v.strip() if v else v for k, v in row.items()}
+
+            # Skip if no email present
+            email = row.get("email", "").strip()
+            if not email:
+                self.stdout.write(
+                    self.style.WARNING(f"Row {row_num}: Skipped - no email provided")
+                )
+                skipped_count += 1
+                continue
+
+            try:
+                employee_data = self.parse_row(row)
+
+                # Check if employee exists
+                employee, created = Employee.objects.update_or_create(
+                    email=email, defaults=employee_data
+                )
+
+                if created:
+                    created_count += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Row {row_num}: Created employee {email}")
+                    )
+                else:
+                    updated_count += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Row {row_num}: Updated employee {email}")
+                    )
+
+            except Exception as e:
+                error_count += 1
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Row {row_num}: Error processing {email}: {str(e)}"
+                    )
+                )
+
+        return created_count, updated_count, skipped_count, error_count
+
+    def import_bulk(self, reader, batch_size, rejects):
+        """
+        Stream the CSV in batches of `batch_size` rows. Every batch is
+        upserted with one bulk_create(update_conflicts=True) on email and
+        committed on its own, so memory use and transaction length don't
+        grow with the file. Rows that can't be imported go to `rejects`
+        rather than the terminal.
+        """
+        created_count = 0
+        updated_count = 0
+        counts = {"skipped": 0, "errors": 0}
+
+        rows = self.parsed_rows(reader, rejects, counts)
+        rows = self.encrypted_rows(rows, batch_size, rejects, counts)
+        for batch in batched(rows, batch_size):
+            created, updated, errors = self.upsert_batch(batch, rejects)
+            employee_cache.invalidate_all()
+            created_count += created
+            updated_count += updated
+            counts["errors"] += errors
+            if self.verbosity > 1:
+                self.stdout.write(
+                    f"Rows {batch[0][0]}-{batch[-1][0]}: "
+                    f"{created} created, {updated} updated, {errors} errors"
+                )
+
+        return created_count, updated_count, counts["skipped"], counts["errors"]
+
+    def parsed_rows(self, reader, rejects, counts):
+        """
+        Yield (row_num, row, data) for every row parse_row() accepts. The
+        others are written to `rejects` and counted in `counts`.
+        """
+        for row_num, row in enumerate(reader, start=2):
+            # Strip whitespace from all values
+            row = {k: v.strip() if v else v for k, v in row.items()}
+
+            # Skip if no email present
+            if not row.get("email", "").strip():
+                rejects.write(row_num, row, "Skipped - no email provided")
+                counts["skipped"] += 1
+                continue
+
+            try:
+                yield row_num, row, self.parse_row(row)
+            except Exception as e:
+                counts["errors"] += 1
+                rejects.write(row_num, row, e)
+
+    def encrypted_rows(self, rows, batch_size, rejects, counts):
+        """
+        Replace the plaintext sin_e of parsed rows with a Fernet token and
+        fill in sin_bidx, so the database write stores ciphertext directly.
+        Batches are encrypted on a thread pool ahead of the one being
+        written, overlapping the Fernet work with the database round trips.
+        """
+        fernet = Employee._meta.get_field("sin_e").f
+        index_key = get_blind_index_key()
+
+        def encrypt(batch):
+            sins = [(i, data["sin_e"]) for i, (*_, data) in enumerate(batch)]
+            return encrypt_rows([pair for pair in sins if pair[1]], fernet, index_key)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for batch in batched(rows, batch_size):
+                pending.append((batch, executor.submit(encrypt, batch)))
+                if len(pending) <= self.workers:
+                    continue
+                batch, future = pending.popleft()
+                yield from self.apply_encryption(
+                    batch, future.result(), rejects, counts
+                )
+            while pending:
+                batch, future = pending.popleft()
+                yield from self.apply_encryption(
+                    batch, future.result(), rejects, counts
+                )
+
+    def apply_encryption(self, batch, results, rejects, counts):
+        """
+        Yield the rows of `batch` with their encrypt_rows() `results` applied,
+        rejecting the rows that failed to encrypt.
+        """
+        failed = set()
+        for i, token, index, error in results:
+            row_num, row, data = batch[i]
+            if error is None:
+                data["sin_e"] = Ciphertext(token)
+                data["sin_bidx"] = index
+            else:
+                failed.add(i)
+                counts["errors"] += 1
+                rejects.write(row_num, row, error)
+        for i, (row_num, row, data) in enumerate(batch):
+            if i not in failed:
+                if not data["sin_e"]:
+                    data["sin_bidx"] = None
+                yield row_num, row, data
+
+    def import_copy(self, reader, rejects):
+        """
+        COPY the normalized rows into an unlogged staging table, reject rows
+        whose foreign keys or unique ids can't be merged, then merge the rest
+        into employees_employee with a single INSERT ... ON CONFLICT (email).
+        """
+        counts = {"skipped": 0, "errors": 0}
+        fields = [Employee._meta.get_field(name) for name in COPY_FIELDS]
+
+        # The rows are parsed while COPY reads them, and any other query on
+        # the connection would abort the COPY: load the reference tables
+        # now, and don't let a version check reload them mid-stream.
+        self.reference_ids = {
+            model: {obj.pk for obj in reference_data.all(model)}
+            for model in (City, Status, Geography, Relationship)
+        }
+        default_geography_id = reference_data.get(
+            Geography, name=DEFAULT_GEOGRAPHY_NAME
+        ).pk
+
+        def rows():
+            parsed = self.parsed_rows(reader, rejects, counts)
+            for row_num, row, data in self.encrypted_rows(
+                parsed, 1000, rejects, counts
+            ):
+                try:
+                    employee = Employee(**data)
+                    if employee.geography_id is None:
+                        employee.geography_id = default_geography_id
+                    employee.apply_invariants()
+                    # pre_save() rather than getattr() so sin_e stays a token.
+                    values = [field.pre_save(employee, True) for field in fields]
+                    # COPY fails as a whole on a single bad value, so check
+                    # lengths and ranges here, one row at a time.
+                    for field, value in zip(fields, values):
+                        if value is not None:
+                            field.run_validators(value)
+                except Exception as e:
+                    counts["errors"] += 1
+                    rejects.write(row_num, row, e)
+                    continue
+                yield [row_num, *values]
+
+        qn = connection.ops.quote_name
+        table = qn(Employee._meta.db_table)
+        staging = qn("%s_import_%d" % (Employee._meta.db_table, os.getpid()))
+        columns = [qn(field.column) for field in fields]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE UNLOGGED TABLE %s (row_num integer, %s)"
+                % (
+                    staging,
+                    ", ".join(
+                        "%s %s" % (column, field.db_type(connection))
+                        for column, field in zip(columns, fields)
+                    ),
+                )
+            )
+
+            copy_sql = "COPY %s (row_num, %s) FROM STDIN WITH (FORMAT csv)" % (
+                staging,
+                ", ".join(columns),
+            )
+            stream = CSVStream(rows())
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2
+                cursor.copy_expert(copy_sql, stream, size=65536)
+            else:
+                # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    while data := stream.read(65536):
+                        copy.write(data)
+
+            for row_num, error in self.reject_staged(cursor, staging, fields):
+                counts["errors"] += 1
+                rejects.write(row_num, {}, error)
+
+            cursor.execute("SELECT count(*) FROM %s" % staging)
+            (staged,) = cursor.fetchone()
+
+            # Later rows win when an email repeats, as with update_or_create.
+            # It also keeps ON CONFLICT from touching the same row twice.
+            email = qn("email")
+            cursor.execute(
+                """
+                WITH merged AS (
+                    INSERT INTO %(table)s
+                        (password, is_superuser, is_staff, date_joined, %(columns)s)
+                    SELECT DISTINCT ON (%(email)s)
+                        '', false, false, now(), %(columns)s
+                    FROM %(staging)s
+                    ORDER BY %(email)s, row_num DESC
+                    ON CONFLICT (%(email)s) DO UPDATE SET %(updates)s
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT count(*) FILTER (WHERE inserted) FROM merged
+                """
+                % {
+                    "table": table,
+                    "staging": staging,
+                    "email": email,
+                    "columns": ", ".join(columns),
+                    "updates": ", ".join(
+                        "%s = EXCLUDED.%s" % (column, column)
+                        for column in columns
+                        if column != email
+                    ),
+                }
+            )
+            (created_count,) = cursor.fetchone()
+            cursor.execute("DROP TABLE %s" % staging)
+        transaction.on_commit(employee_cache.invalidate_all)
+
+        return (
+            created_count,
+            staged - created_count,
+            counts["skipped"],
+            counts["errors"],
+        )
+
+    def reject_staged(self, cursor, staging, fields):
+        """
+        Delete staged rows that would make the merge fail as a whole:
+        unknown foreign keys, and unique ids already used by another email.
+        Yields (row_num, error) for each.
+        """
+        qn = connection.ops.quote_name
+        table = qn(Employee._meta.db_table)
+        email = qn("email")
+        for field in fields:
+            column = qn(field.column)
+            if field.is_relation:
+                related = field.related_model._meta
+                cursor.execute(
+                    """
+                    DELETE FROM %(staging)s s
+                    WHERE s.%(column)s IS NOT NULL AND NOT EXISTS (
+                        SELECT 1 FROM %(related)s r WHERE r.%(pk)s = s.%(column)s
+                    )
+                    RETURNING row_num, s.%(column)s
+                    """
+                    % {
+                        "staging": staging,
+                        "column": column,
+                        "related": qn(related.db_table),
+                        "pk": qn(related.pk.column),
+                    }
+                )
+                for row_num, value in cursor.fetchall():
+                    yield row_num, f"Unknown {field.column}: {value}"
+            elif field.unique and field.name != "email":
+                cursor.execute(
+                    """
+                    DELETE FROM %(staging)s s
+                    WHERE s.%(column)s IS NOT NULL AND (
+                        EXISTS (
+                            SELECT 1 FROM %(table)s e
+                            WHERE e.%(column)s = s.%(column)s
+                            AND e.%(email)s <> s.%(email)s
+                        )
+                        OR EXISTS (
+                            SELECT 1 FROM %(staging)s o
+                            WHERE o.%(column)s = s.%(column)s
+                            AND o.%(email)s <> s.%(email)s
+                            AND o.row_num < s.row_num
+                        )
+                    )
+                    RETURNING row_num, s.%(column)s
+                    """
+                    % {
+                        "staging": staging,
+                        "table": table,
+                        "column": column,
+                        "email": email,
+                    }
+                )
+                for row_num, value in cursor.fetchall():
+                    yield row_num, f"{field.column} {value} is used by another employee"
+
+    def upsert_batch(self, batch, rejects):
+        """
+        Upsert and commit (row_num, row, data) triples. If the batch fails as
+        a whole, it is retried row by row so only the bad rows are rejected.
+        """
+        try:
+            with transaction.atomic():
+                return *self.upsert(batch), 0
+        except Exception:
+            pass
+
+        created_count = updated_count = error_count = 0
+        for row_num, row, data in batch:
+            try:
+                with transaction.atomic():
+                    created, updated = self.upsert([(row_num, row, data)])
+                created_count += created
+                updated_count += updated
+            except Exception as e:
+                error_count += 1
+                rejects.write(row_num, row, e)
+        return created_count, updated_count, error_count
+
+    def upsert(self, batch):
+        # Later rows win when an email repeats, as with update_or_create. It
+        # also keeps ON CONFLICT from touching the same row twice.
+        rows = {data["email"]: data for row_num, row, data in batch}
+        employees = [Employee(**data) for data in rows.values()]
+
+        # bulk_create() skips save(), so apply its invariants here.
+        Employee.bulk_apply_invariants(employees)
+
+        existing = set(
+            Employee.all_objects.filter(email__in=rows).values_list("email", flat=True)
+        )
+        update_fields = {
+            *next(iter(rows.values())),
+            "geography_id",
+            "sin_bidx",
+            "modified",
+        }
+        update_fields.discard("email")
+        Employee.all_objects.bulk_create(
+            employees,
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=sorted(update_fields),
+        )
+        created = len(rows) - len(existing)
+        return created, len(batch) - created
+
     def parse_row(self, row):
         """Parse a CSV row into Employee model fields"""
         data = {}
@@ -102,7 +638,10 @@ class Command(BaseCommand):
 
         # Optional text fields
         data["middle_name"] = row.get("middle_name", "").strip() or None
-        data["sin"] = row.get("sin", "").strip()
+        sin = row.get("sin", "").strip()
+        data["sin"] = sin if self.plaintext_sin else ""
+        # Encrypted by the field on save, or ahead of time by the bulk paths.
+        data["sin_e"] = sin or None
         data["address"] = row.get("address", "").strip()
         data["address2"] = row.get("address2", "").strip()
         data["postal_code"] = row.get("postal_code", "").strip()
@@ -113,10 +652,6 @@ class Command(BaseCommand):
         data["notes"] = row.get("notes", "").strip() or None
         data["color"] = row.get("color", "").strip() or "AAAAAA"
 
-        # Boolean fields
-        is_active = row.get("is_active", "True").strip()
-        data["is_active"] = is_active.lower() in ("true", "1", "yes", "t")
-
         # Date fields
         data["date_of_birth"] = self.parse_date(row.get("date_of_birth"))
         data["date_hired"] = (
@@ -141,27 +676,34 @@ class Command(BaseCommand):
         # Decimal fields
         data["salary"] = self.parse_decimal(row.get("salary"))
 
-        # Foreign key fields
-        city_id = row.get("city_id", "").strip()
-        if city_id:
-            try:
-                data["city_id"] = int(city_id)
-            except (ValueError, TypeError):
-                data["city_id"] = City.HALIFAX_ID
-        else:
-            data["city_id"] = City.HALIFAX_ID
-
-        relationship_id = row.get("emergency_relationship_id", "").strip()
-        if relationship_id:
-            try:
-                data["emergency_relationship_id"] = int(relationship_id)
-            except (ValueError, TypeError):
-                data["emergency_relationship_id"] = None
-        else:
-            data["emergency_relationship_id"] = None
+        # Foreign key fields, checked against the cached reference tables
+        data["city_id"] = self.parse_reference(
+            City, row.get("city_id"), City.HALIFAX_ID
+        )
+        data["status_id"] = self.parse_reference(
+            Status, row.get("status_id"), Status.FULLTIME_ID
+        )
+        # Left empty, save() falls back to the default geography.
+        data["geography_id"] = self.parse_reference(Geography, row.get("geography_id"))
+        data["emergency_relationship_id"] = self.parse_reference(
+            Relationship, row.get("emergency_relationship_id")
+        )
 
         return data
 
+    def parse_reference(self, model, value, default=None):
+        """Parse a foreign key id, which must exist in `model`"""
+        pk = self.parse_int(value)
+        if pk is None:
+            return default
+        if self.reference_ids is not None:
+            exists = pk in self.reference_ids[model]
+        else:
+            exists = reference_data.exists(model, pk)
+        if not exists:
+            raise ValueError(f"Unknown {model._meta.model_name} id: {pk}")
+        return pk
+
     def parse_date(self, date_str):
         """Parse date string in various formats"""
         if not date_str or not date_str.strip():
@@ -0,0 +1,214 @@
+# employees/management/commands/rotate_keys.py
+import time
+from functools import reduce
+from operator import or_
+
+from cryptography.fernet import MultiFernet
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+
+from employees import cache as employee_cache
+from employees.models import Employee
+from utils.crypto import blind_index, ciphertext, rotate_rows, update_ciphertext
+from utils.helpers import BatchCommandMixin, Checkpoint, keyset_paginate
+from utils.keys import (
+    TimedFernet,
+    blind_index_key,
+    build_fernet,
+    derive_keys,
+    salt_keys,
+)
+
+
+class Command(BatchCommandMixin, BaseCommand):
+    help = "Re-encrypt sin_e after SECRET_KEY / SALT_KEY have been rotated"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--old-secret-key",
+            action="append",
+            help=(
+                "Secret key the data may currently be encrypted with. Can be "
+                "given several times (default: SECRET_KEY_FALLBACKS)"
+            ),
+        )
+        parser.add_argument(
+            "--old-salt-key",
+            action="append",
+            help="Salt key paired with the old secret keys (default: SALT_KEY)",
+        )
+        parser.add_argument(
+            "--new-secret-key",
+            help="Secret key to encrypt with (default: SECRET_KEY)",
+        )
+        parser.add_argument(
+            "--new-salt-key",
+            help="Salt key to encrypt with (default: the first SALT_KEY)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of records to process in each batch (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Run without making changes to see what would happen",
+        )
+        parser.add_argument(
+            "--checkpoint-file",
+            default=".rotate_keys.checkpoint",
+            help=(
+                "File recording the last committed pk "
+                "(default: .rotate_keys.checkpoint)"
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue after the pk recorded in the checkpoint file",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        checkpoint = Checkpoint(options["checkpoint_file"])
+
+        new_secret_key = options["new_secret_key"] or settings.SECRET_KEY
+        new_salt_key = options["new_salt_key"] or salt_keys()[0]
+        new_keys = derive_keys([new_secret_key], [new_salt_key])
+        # The blind index is keyed off the same secrets, so it moves too.
+        index_key = blind_index_key(new_secret_key, new_salt_key)
+        old_keys = derive_keys(
+            options["old_secret_key"] or getattr(settings, "SECRET_KEY_FALLBACKS", []),
+            options["old_salt_key"] or salt_keys(),
+        )
+        if not old_keys:
+            self.stdout.write(
+                self.style.ERROR(
+                    "No old keys: pass --old-secret-key or set SECRET_KEY_FALLBACKS"
+                )
+            )
+            return
+
+        current = build_fernet(new_keys)
+        fernet = MultiFernet([current, *(build_fernet([key]) for key in old_keys)])
+        # Reported to crypto_hooks like the field's own operations.
+        field = str(Employee._meta.get_field("sin_e"))
+        current, fernet = TimedFernet(current, field), TimedFernet(fernet, field)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN MODE - No changes will be saved")
+            )
+
+        queryset = Employee.all_objects.filter(sin_e__isnull=False).annotate(
+            token=ciphertext("sin_e")
+        )
+        after = checkpoint.load() if options["resume"] else None
+        if after is not None:
+            self.stdout.write(f"Resuming after ID {after}")
+            queryset = queryset.filter(pk__gt=after)
+
+        total = queryset.count()
+        self.stdout.write(f"Records to check: {total}\n")
+
+        rotated = 0
+        skipped = 0
+        errors = 0
+        processed = 0
+        changed = 0
+        started = time.monotonic()
+
+        for rows in keyset_paginate(queryset, batch_size, "token"):
+            results = rotate_rows(rows, fernet, current, index_key)
+            skipped += len(rows) - len(results)
+            tokens = {}
+            indexes = {}
+            for pk, token, index, error in results:
+                if error is None:
+                    tokens[pk] = token
+                    indexes[pk] = index
+                else:
+                    errors += 1
+                    self.stdout.write(
+                        self.style.ERROR(f"  ✗ Error rotating ID {pk}: {error}")
+                    )
+
+            updated = len(tokens)
+            if not dry_run:
+                try:
+                    # Rows whose token changed since it was read, e.g. a SIN
+                    # edited in the admin, already hold a new value.
+                    with transaction.atomic():
+                        updated = update_ciphertext(
+                            queryset,
+                            "sin_e",
+                            tokens,
+                            expected=dict(rows),
+                            sin_bidx=indexes,
+                        )
+                    employee_cache.invalidate_all()
+                except Exception as e:
+                    errors += len(tokens)
+                    updated = 0
+                    self.stdout.write(
+                        self.style.ERROR(f"  ✗ Error writing batch: {str(e)}")
+                    )
+                    self.batch_failed(checkpoint)
+                else:
+                    changed += len(tokens) - updated
+                checkpoint.commit(rows[-1][0])
+
+            rotated += updated
+            processed += len(rows)
+            rate = processed / (time.monotonic() - started)
+            self.stdout.write(
+                f"Progress: {processed}/{total} records processed ({rate:.0f} rows/s)"
+            )
+
+        reindexed = self.reindex_plaintext(index_key, batch_size, dry_run)
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.print_summary(
+            "Rotation complete!",
+            {
+                "Rotated": rotated,
+                "Already current": skipped,
+                "Changed while rotating, left alone": changed,
+                "Plaintext-only blind indexes re-keyed": reindexed,
+                "Errors": errors,
+                "Elapsed": f"{elapsed:.1f}s ({rate:.0f} rows/s)",
+            },
+            dry_run,
+        )
+
+    def reindex_plaintext(self, index_key, batch_size, dry_run):
+        """
+        Re-key the blind index of rows that only have a plaintext SIN, which
+        the re-encryption above never reads. Returns the number of rows.
+        """
+        queryset = (
+            Employee.all_objects.filter(Q(sin_e__isnull=True) | Q(sin_e=""))
+            .exclude(sin__isnull=True)
+            .exclude(sin="")
+        )
+        reindexed = 0
+        for rows in keyset_paginate(queryset, batch_size, "sin"):
+            indexes = {pk: blind_index(sin, index_key) for pk, sin in rows}
+            if dry_run:
+                reindexed += len(indexes)
+                continue
+            # Rows whose SIN changed since it was read were indexed on save.
+            reindexed += queryset.filter(
+                reduce(or_, (Q(pk=pk, sin=sin) for pk, sin in rows))
+            ).update(
+                sin_bidx=Case(
+                    *[When(pk=pk, then=Value(index)) for pk, index in indexes.items()]
+                )
+            )
+        return reindexed
@@ -1,8 +1,104 @@
+import re
+
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
+from django.db.models import (
+    BooleanField,
+    CharField,
+    Count,
+    ExpressionWrapper,
+    F,
+    Func,
+    Q,
+)
 from django.utils.translation import gettext_lazy as _
 
+from utils.crypto import blind_index
+
+
+class PhoneDigits(Func):
+    """
+    The digits of a phone number column. On PostgreSQL the expression is
+    the one the phone trigram index is built on (employees migration 0011),
+    with the pattern inlined so the planner can match it.
+    """
+
+    template = "REGEXP_REPLACE(%(expressions)s, '\\D', '', 'g')"
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # No REGEXP_REPLACE: strip the usual separators instead.
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        for char in " -().+":
+            sql = "REPLACE(%s, '%s', '')" % (sql, char)
+        return sql, params
+
+
+class EmployeeQuerySet(models.QuerySet):
+    def _active_q(self):
+        Status = self.model._meta.get_field("status").related_model
+        return Q(status_id__in=Status.ACTIVE_IDS)
+
+    def active(self):
+        """
+        Full time, part time and casual employees, see Employee.is_active().
+        """
+        return self.filter(self._active_q())
+
+    def inactive(self):
+        return self.exclude(self._active_q())
+
+    def with_active(self):
+        """
+        Annotate `active`, Employee.is_active() computed by the database so
+        it can be sorted and filtered on.
+        """
+        return self.annotate(
+            active=ExpressionWrapper(self._active_q(), output_field=BooleanField())
+        )
+
+    def with_location(self):
+        """
+        Join the city and its province, for full_address() and str(city).
+        """
+        return self.select_related("city__province")
+
+    def filter_by_phone(self, number):
+        """
+        Employees whose phone number contains the digits of `number`, so
+        "902 555" matches "902-555-0199".
+        """
+        digits = re.sub(r"\D", "", number)
+        if not digits:
+            return self.none()
+        return self.alias(phone_digits=PhoneDigits(F("phone_number"))).filter(
+            phone_digits__contains=digits
+        )
+
+    def filter_by_sin(self, sin):
+        """
+        Employees with the given SIN, looked up through the indexed blind
+        index rather than by decrypting every row.
+        """
+        index = blind_index(sin)
+        if index is None:
+            return self.none()
+        return self.filter(sin_bidx=index)
+
+    def duplicate_sins(self):
+        """
+        Blind index values shared by more than one employee, with counts.
+        """
+        return (
+            self.exclude(sin_bidx=None)
+            .values("sin_bidx")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .order_by()
+        )
+
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(EmployeeQuerySet)):
     """
     Custom user model manager where email is the unique identifiers
     for authentication instead of usernames.
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 01:59
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+from utils.crypto import blind_index
+from utils.helpers import keyset_paginate
+
+
+def backfill_sin_bidx(apps, schema_editor):
+    # The plaintext column is still populated, so the index can be built
+    # without decrypting anything.
+    Employee = apps.get_model("employees", "Employee")
+    queryset = Employee.objects.exclude(sin="")
+    for rows in keyset_paginate(queryset, 1000, "sin"):
+        Employee.objects.filter(pk__in=[pk for pk, sin in rows]).update(
+            sin_bidx=Case(*[When(pk=pk, then=Value(blind_index(sin))) for pk, sin in rows])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_employee_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='sin_bidx',
+            field=models.CharField(db_index=True, editable=False, max_length=64, null=True, verbose_name='SIN index'),
+        ),
+        migrations.RunPython(backfill_sin_bidx, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 02:00
+
+import utils.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employee_sin_bidx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='sin_e',
+            field=utils.fields.LazyEncryptedCharField(max_length=120, null=True, verbose_name='SIN(e)'),
+        ),
+    ]
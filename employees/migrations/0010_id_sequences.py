@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Max
+
+# Must match utils.helpers.ID_BLOCK_SIZE.
+BLOCK_SIZE = 10
+ID_FIELDS = ("iss_iat_id", "mss_id")
+
+
+def create_sequences(apps, schema_editor):
+    # Only PostgreSQL has sequences; IdAllocator falls back to MAX() + 1
+    # elsewhere.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Employee = apps.get_model("employees", "Employee")
+    qn = schema_editor.quote_name
+    for field in ID_FIELDS:
+        highest = Employee.objects.aggregate(Max(field))["%s__max" % field]
+        schema_editor.execute(
+            "CREATE SEQUENCE IF NOT EXISTS %s INCREMENT BY %s START WITH %s"
+            % (
+                qn("%s_%s_seq" % (Employee._meta.db_table, field)),
+                BLOCK_SIZE,
+                highest + 1 if highest else 1,
+            )
+        )
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Employee = apps.get_model("employees", "Employee")
+    for field in ID_FIELDS:
+        schema_editor.execute(
+            "DROP SEQUENCE IF EXISTS %s"
+            % schema_editor.quote_name("%s_%s_seq" % (Employee._meta.db_table, field))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_employee_sin_e_lazy'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
@@ -0,0 +1,46 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN trigram indexes on the exact expressions the admin search filters on:
+# UPPER(column::text) for Django's icontains, and the digits of the phone
+# number (employees.managers.PhoneDigits). Built concurrently so the table
+# stays writable, which means this migration can't run in a transaction.
+INDEXES = {
+    "employees_employee_first_name_trgm": "UPPER((first_name)::text)",
+    "employees_employee_last_name_trgm": "UPPER((last_name)::text)",
+    "employees_employee_email_trgm": "UPPER((email)::text)",
+    "employees_employee_phone_digits_trgm": (
+        "REGEXP_REPLACE((phone_number)::text, '\\D', '', 'g')"
+    ),
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, expression in INDEXES.items():
+        schema_editor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON employees_employee "
+            "USING gin ((%s) gin_trgm_ops)" % (name, expression)
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS %s" % name)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('employees', '0010_id_sequences'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_employee_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('status__in', (1, 2, 3))), fields=['geography', 'status'], name='employee_active_geo_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['-date_hired', '-id'], name='employee_date_hired_idx'),
+        ),
+    ]
@@ -5,12 +5,12 @@ from django.db import models
 from django.db.models import Manager
 from django.utils import timezone
 
-from encrypted_fields.fields import EncryptedCharField
-
-
 from misc.models import City, Relationship
-from utils.helpers import friendly_capitalize, next_id
-from randomcolor import RandomColor
+from utils.colors import assign_colors, color_for
+from utils.crypto import blind_index
+from utils.fields import Ciphertext, LazyEncryptedCharField
+from utils.helpers import friendly_capitalize, next_id, reserve_ids, sync_ids
+from utils.reference import reference_data
 
 from .managers import CustomUserManager
 
@@ -81,7 +81,12 @@ class Employee(Geographical, AbstractUser):
     middle_name = models.CharField(max_length=32, null=True, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     sin = models.CharField("SIN", max_length=11, blank=True)
-    sin_e = EncryptedCharField("SIN(e)", max_length=120, null=True)
+    sin_e = LazyEncryptedCharField("SIN(e)", max_length=120, null=True)
+    # Ciphertext in sin_e is randomized, so exact SIN lookups go through this
+    # HMAC instead. See utils.crypto.blind_index.
+    sin_bidx = models.CharField(
+        "SIN index", max_length=64, null=True, editable=False, db_index=True
+    )
     date_hired = models.DateField(default=timezone.localdate, null=True, blank=True)
     date_released = models.DateField(null=True, blank=True)
 
@@ -120,8 +125,24 @@ class Employee(Geographical, AbstractUser):
     weekly_hours = models.PositiveSmallIntegerField(
         default=0, help_text="The number of hours this employee works per week"
     )
+    # Set by save() and the bulk import paths; QuerySet.update() callers
+    # have to set it themselves.
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
+
+    class Meta:
+        indexes = [
+            # Active employees by geography, see EmployeeQuerySet.active().
+            models.Index(
+                fields=["geography", "status"],
+                condition=models.Q(status__in=Status.ACTIVE_IDS),
+                name="employee_active_geo_status_idx",
+            ),
+            # The admin changelist's default ordering, with its pk tiebreaker.
+            models.Index(fields=["-date_hired", "-id"], name="employee_date_hired_idx"),
+        ]
+
     objects = CustomUserManager()
     all_objects = Manager()
 
@@ -138,19 +159,46 @@ class Employee(Geographical, AbstractUser):
         self.address = friendly_capitalize(self.address)
 
     def save(self, *args, **kwargs):
+        self.apply_invariants()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"sin", "sin_e"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "sin_bidx"}
+
+        super().save(*args, **kwargs)
+
+    def apply_invariants(self):
+        """
+        Fill in the values save() guarantees. bulk_create() and bulk_update()
+        don't call save(), so bulk paths go through bulk_apply_invariants().
+        """
         if self.color == DEFAULT_COLOR:
-            self.color = RandomColor().generate(luminosity="light")[0].lstrip("#")
+            # Saved employees get the color of their pk, so it's reproducible.
+            self.color = color_for(self.pk) if self.pk else assign_colors(1)[0]
 
         # Employees with a release date should be set to inactive.
         if self.date_released is not None:
             self.status_id = Status.INACTIVE_ID
 
         if self.geography_id is None:
-            self.geography = Geography.objects.get(
-                name=DEFAULT_GEOGRAPHY_NAME,
-            )
+            self.geography_id = reference_data.get(
+                Geography, name=DEFAULT_GEOGRAPHY_NAME
+            ).pk
 
-        super().save(*args, **kwargs)
+        # Don't decrypt just to recompute an index that cannot have changed.
+        if not isinstance(self.__dict__.get("sin_e"), Ciphertext):
+            self.sin_bidx = blind_index(self.sin_e or self.sin)
+
+    @staticmethod
+    def bulk_apply_invariants(employees):
+        """
+        apply_invariants() for many employees, drawing new colors in one go.
+        """
+        unsaved = [e for e in employees if e.pk is None and e.color == DEFAULT_COLOR]
+        for employee, color in zip(unsaved, assign_colors(len(unsaved))):
+            employee.color = color
+        for employee in employees:
+            employee.apply_invariants()
 
     def full_name(self):
         return "%s, %s" % (self.first_name, self.last_name)
@@ -159,10 +207,15 @@ class Employee(Geographical, AbstractUser):
     full_name.admin_order_field = "surname"
 
     def full_address(self):
+        # Joined by with_location(), otherwise from the reference data cache.
+        if Employee.city.is_cached(self):
+            city = self.city
+        else:
+            city = reference_data.get(City, self.city_id)
         return "%s, %s, %s" % (
             self.address,
-            self.city.name,
-            self.city.province.abbreviation,
+            city.name,
+            city.cached_province().abbreviation,
         )
 
     full_address.short_description = "address"
@@ -195,3 +248,17 @@ class Employee(Geographical, AbstractUser):
     @staticmethod
     def next_mss_id():
         return next_id(Employee, "mss_id")
+
+    @staticmethod
+    def reserve_iss_iat_ids(n):
+        return reserve_ids(Employee, "iss_iat_id", n)
+
+    @staticmethod
+    def reserve_mss_ids(n):
+        return reserve_ids(Employee, "mss_id", n)
+
+    @staticmethod
+    def sync_id_allocators():
+        # After iss_iat_id/mss_id values were written explicitly (imports).
+        sync_ids(Employee, "iss_iat_id")
+        sync_ids(Employee, "mss_id")
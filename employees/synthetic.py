@@ -0,0 +1,196 @@
+"""
+Synthetic employees for load testing, see the generate_employees command.
+
+Rows are plain dicts of Employee attnames so they can be turned into model
+instances or CSV lines alike. Proportions (status mix, optional fields,
+phone area codes) follow employees_employee.csv.
+"""
+
+import random
+import string
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from utils.colors import color_for
+
+from .models import DEFAULT_GEOGRAPHY_NAME, Status
+
+FIRST_NAMES = (
+    "Aiden Amelia Ava Benjamin Charlotte Chloe Daniel Emily Emma Ethan "
+    "Gurpreet Hannah Harpreet Isabella Jack Jacob James Liam Logan Lucas "
+    "Mason Mia Manpreet Noah Olivia Owen Priya Rahul Sophia William"
+).split()
+LAST_NAMES = (
+    "Brown Campbell Chen Cormier Doucette Fraser Gill Kaur LeBlanc "
+    "MacDonald MacKenzie MacLean Martin Murphy Nguyen Patel Power Roy "
+    "Sharma Singh Smith Stewart Thompson Walsh White Wilson"
+).split()
+STREETS = (
+    "Main St",
+    "Portland St",
+    "Quinpool Rd",
+    "Robie St",
+    "Spring Garden Rd",
+    "Water St",
+    "Pleasant St",
+    "Prince St",
+    "Cape Broyle Place",
+    "Nelsons Landing Blvd",
+)
+AREA_CODES = ("902", "902", "902", "902", "709", "647", "437", "782")
+INACTIVE_SHARE = 0.88
+
+
+@dataclass
+class Reference:
+    """
+    The reference rows generated employees point to.
+    """
+
+    # (city id, province abbreviation)
+    cities: list
+    relationship_ids: list
+    # {geography name: id}
+    geographies: dict
+
+
+def sin(rng):
+    """
+    A random nine digit number that passes the SIN (Luhn) check.
+    """
+    digits = [rng.randrange(1, 10)] + [rng.randrange(10) for _ in range(7)]
+    total = 0
+    for i, digit in enumerate(digits):
+        if i % 2:
+            digit *= 2
+            digit = digit - 9 if digit > 9 else digit
+        total += digit
+    digits.append((10 - total % 10) % 10)
+    number = "".join(map(str, digits))
+    return "%s-%s-%s" % (number[:3], number[3:6], number[6:])
+
+
+def phone_number(rng):
+    return "%s-%03d-%04d" % (
+        rng.choice(AREA_CODES),
+        rng.randrange(200, 1000),
+        rng.randrange(10000),
+    )
+
+
+def postal_code(rng):
+    letter = string.ascii_uppercase
+    return "%s%d%s %d%s%d" % (
+        rng.choice("ABCEGHJKLMNPRSTVXY"),
+        rng.randrange(10),
+        rng.choice(letter),
+        rng.randrange(10),
+        rng.choice(letter),
+        rng.randrange(10),
+    )
+
+
+def share(number, salt):
+    """
+    Stable pseudo-random percentile (0-99) of employee `number`, so that
+    who gets which optional id can be counted before generating.
+    """
+    return ((number ^ salt) * 2654435761) % 2**32 % 100
+
+
+def has_iss_iat_id(number):
+    return share(number, 0x1551) < 89
+
+
+def has_mss_id(number):
+    return share(number, 0x3551) < 13
+
+
+def random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def generate(start, count, seed, reference, tag, iss_iat_ids, mss_ids):
+    """
+    `count` employees numbered from `start`. Emails contain `tag` and the
+    number, so they are unique within and across runs. `iss_iat_ids` and
+    `mss_ids` are reserved ids, one per employee of the range for which
+    has_iss_iat_id() and has_mss_id() are true.
+    """
+    rng = random.Random("%s-%s" % (seed, start))
+    iss_iat_ids = iter(iss_iat_ids)
+    mss_ids = iter(mss_ids)
+    today = date.today()
+    default_geography_id = reference.geographies[DEFAULT_GEOGRAPHY_NAME]
+    rows = []
+    for number in range(start, start + count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        city_id, province = rng.choice(reference.cities)
+        date_hired = random_date(rng, date(2010, 1, 1), today)
+
+        # Released employees are inactive, and only them.
+        if rng.random() < INACTIVE_SHARE:
+            status_id = Status.INACTIVE_ID
+            date_released = random_date(rng, date_hired, today)
+            weekly_hours = 0
+        else:
+            status_id = rng.choice(Status.ACTIVE_IDS)
+            date_released = None
+            weekly_hours = {
+                Status.FULLTIME_ID: 40,
+                Status.PARTTIME_ID: 20,
+                Status.CASUAL_ID: rng.choice((0, 8, 16)),
+            }[status_id]
+
+        rows.append(
+            {
+                "email": "%s.%s.%s%d@example.com"
+                % (first_name.lower(), last_name.lower(), tag, number),
+                "first_name": first_name,
+                "last_name": last_name,
+                "middle_name": (
+                    rng.choice(FIRST_NAMES) if rng.random() < 0.17 else None
+                ),
+                "date_of_birth": random_date(rng, date(1960, 1, 1), date(2006, 1, 1)),
+                "sin": sin(rng),
+                "address": "%d %s" % (rng.randrange(1, 400), rng.choice(STREETS)),
+                "address2": (
+                    "Apt %d" % rng.randrange(1, 300) if rng.random() < 0.09 else ""
+                ),
+                "city_id": city_id,
+                "postal_code": postal_code(rng),
+                "phone_number": phone_number(rng),
+                "extra_phone_number": (
+                    phone_number(rng) if rng.random() < 0.1 else None
+                ),
+                "emergency_contact_name": "%s %s"
+                % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+                "emergency_phone_number": phone_number(rng),
+                "emergency_relationship_id": (
+                    rng.choice(reference.relationship_ids)
+                    if rng.random() < 0.71
+                    else None
+                ),
+                "status_id": status_id,
+                "geography_id": reference.geographies.get(
+                    province, default_geography_id
+                ),
+                "date_hired": date_hired,
+                "date_released": date_released,
+                "iss_iat_id": next(iss_iat_ids) if has_iss_iat_id(number) else None,
+                "mss_id": next(mss_ids) if has_mss_id(number) else None,
+                "iss_security_license_number": (
+                    rng.randrange(10000, 100000) if rng.random() < 0.72 else None
+                ),
+                "salary": (
+                    "%d.%02d" % (rng.randrange(15, 40), rng.randrange(100))
+                    if rng.random() < 0.21
+                    else None
+                ),
+                "weekly_hours": weekly_hours,
+                "color": color_for(number),
+                "notes": None,
+            }
+        )
+    return rows
@@ -1,3 +1,888 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from employees.management.commands.export_employees import COLUMNS
+from misc.models import City, Province
+from utils import crypto_hooks
+from utils.crypto import bulk_decrypt, ciphertext, rotate_rows, update_ciphertext
+from utils.fields import Ciphertext
+from utils.helpers import EstimatedCountPaginator
+from utils.keys import TimedFernet, derive_keys, get_keys
+from utils.profiling import profiling, signature
+from utils.reference import reference_data
+
+from . import cache as employee_cache
+from .models import Employee, Geography, Status
+
+SIN = "046-454-286"
+
+
+def create_reference_data():
+    province = Province.objects.create(name="Nova Scotia", abbreviation="NS")
+    City.objects.create(pk=City.HALIFAX_ID, name="Halifax", province=province)
+    for pk, name in (
+        (Status.FULLTIME_ID, "Full time"),
+        (Status.PARTTIME_ID, "Part time"),
+        (Status.CASUAL_ID, "Casual"),
+        (Status.INACTIVE_ID, "Inactive"),
+    ):
+        Status.objects.create(pk=pk, name=name)
+    Geography.objects.create(name="NS", timezone="America/Halifax")
+    reference_data.invalidate()
+
+
+def stored_token(employee):
+    return Employee.all_objects.values_list(ciphertext("sin_e"), flat=True).get(
+        pk=employee.pk
+    )
+
+
+class EncryptSinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.employees = [
+            Employee.objects.create(email=f"{i}@example.com", sin=SIN) for i in range(5)
+        ]
+
+    def setUp(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.checkpoint_file = str(directory / "encrypt_sin.checkpoint")
+
+    def encrypt_sin(self, **options):
+        out = io.StringIO()
+        call_command(
+            "encrypt_sin",
+            batch_size=2,
+            checkpoint_file=self.checkpoint_file,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def encrypted(self):
+        return set(
+            Employee.all_objects.filter(sin_e__isnull=False).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def test_encrypts_every_batch(self):
+        output = self.encrypt_sin()
+        self.assertIn("Migrated: 5", output)
+        self.assertEqual(self.encrypted(), {e.pk for e in self.employees})
+        for employee in Employee.all_objects.all():
+            self.assertEqual(employee.sin_e, SIN)
+        self.assertEqual(Employee.objects.filter_by_sin(SIN).count(), 5)
+
+    def test_resume_retries_failed_batch(self):
+        calls = []
+
+        def fail_second_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return update_ciphertext(*args, **kwargs)
+
+        with mock.patch(
+            "employees.management.commands.encrypt_sin.update_ciphertext",
+            fail_second_batch,
+        ):
+            output = self.encrypt_sin()
+        self.assertIn("Migrated: 3", output)
+        self.assertIn("Errors: 2", output)
+        self.assertIn("Checkpoint left at the last committed batch", output)
+        first, third = self.employees[:2], self.employees[4:]
+        self.assertEqual(self.encrypted(), {e.pk for e in first + third})
+
+        output = self.encrypt_sin(resume=True)
+        self.assertIn(f"Resuming after ID {first[-1].pk}", output)
+        self.assertIn("Migrated: 2", output)
+        self.assertIn("Errors: 0", output)
+        self.assertEqual(self.encrypted(), {e.pk for e in self.employees})
+
+
+class RotateKeysTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.old_secret_key = settings.SECRET_KEY
+        cls.encrypted = [
+            Employee.objects.create(email=f"{i}@example.com", sin_e=SIN)
+            for i in range(3)
+        ]
+        cls.plaintext = Employee.objects.create(
+            email="plaintext@example.com", sin="130-692-544"
+        )
+
+    def setUp(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.checkpoint_file = str(directory / "rotate_keys.checkpoint")
+        self.enterContext(
+            override_settings(
+                SECRET_KEY="rotated-secret-key",
+                SECRET_KEY_FALLBACKS=[self.old_secret_key],
+            )
+        )
+
+    def rotate_keys(self):
+        out = io.StringIO()
+        call_command(
+            "rotate_keys",
+            batch_size=2,
+            checkpoint_file=self.checkpoint_file,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_rotates_to_new_keys(self):
+        output = self.rotate_keys()
+        self.assertIn("Rotated: 3", output)
+        self.assertIn("Plaintext-only blind indexes re-keyed: 1", output)
+        with override_settings(SECRET_KEY_FALLBACKS=[]):
+            for employee in Employee.all_objects.filter(sin_e__isnull=False):
+                self.assertEqual(employee.sin_e, SIN)
+            self.assertEqual(
+                set(Employee.objects.filter_by_sin(SIN)), set(self.encrypted)
+            )
+            self.assertEqual(
+                list(Employee.objects.filter_by_sin("130692544")), [self.plaintext]
+            )
+
+        output = self.rotate_keys()
+        self.assertIn("Rotated: 0", output)
+        self.assertIn("Already current: 3", output)
+
+    def test_concurrent_edit_left_alone(self):
+        edited = self.encrypted[0]
+
+        def edit_while_rotating(rows, *args):
+            results = rotate_rows(rows, *args)
+            if edited.pk in dict(rows):
+                # Saved from the admin between the read and the UPDATE.
+                employee = Employee.all_objects.get(pk=edited.pk)
+                employee.sin_e = "130-692-544"
+                employee.save()
+            return results
+
+        with mock.patch(
+            "employees.management.commands.rotate_keys.rotate_rows",
+            edit_while_rotating,
+        ):
+            output = self.rotate_keys()
+        self.assertIn("Rotated: 2", output)
+        self.assertIn("Changed while rotating, left alone: 1", output)
+        with override_settings(SECRET_KEY_FALLBACKS=[]):
+            self.assertEqual(
+                Employee.all_objects.get(pk=edited.pk).sin_e, "130-692-544"
+            )
+            self.assertEqual(Employee.objects.filter_by_sin(SIN).count(), 2)
+
+
+class BlindIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.employee = Employee.objects.create(email="a@example.com", sin_e=SIN)
+
+    def test_filter_by_sin_ignores_formatting(self):
+        for sin in (SIN, "046454286", "046 454 286"):
+            self.assertEqual(
+                list(Employee.objects.filter_by_sin(sin)), [self.employee], sin
+            )
+        self.assertFalse(Employee.objects.filter_by_sin("130-692-544").exists())
+
+    def test_save_update_fields(self):
+        employee = Employee.all_objects.get(pk=self.employee.pk)
+        employee.sin_e = "130-692-544"
+        employee.save(update_fields=["sin_e"])
+        self.assertFalse(Employee.objects.filter_by_sin(SIN).exists())
+        self.assertTrue(Employee.objects.filter_by_sin("130692544").exists())
+
+    def test_plaintext_sin_indexed(self):
+        employee = Employee.objects.create(email="b@example.com", sin="130-692-544")
+        self.assertEqual(list(Employee.objects.filter_by_sin("130692544")), [employee])
+
+
+class LazyEncryptedFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.employee = Employee.objects.create(email="a@example.com", sin_e=SIN)
+
+    def test_stored_encrypted(self):
+        token = stored_token(self.employee)
+        self.assertNotIn("454", token)
+        self.assertEqual(bulk_decrypt([token]), [SIN])
+
+    def test_decrypted_on_access(self):
+        employee = Employee.all_objects.get(pk=self.employee.pk)
+        self.assertIsInstance(employee.__dict__["sin_e"], Ciphertext)
+        self.assertEqual(employee.sin_e, SIN)
+        self.assertNotIsInstance(employee.__dict__["sin_e"], Ciphertext)
+
+    def test_save_without_reading_keeps_token(self):
+        token = stored_token(self.employee)
+        employee = Employee.all_objects.get(pk=self.employee.pk)
+        employee.first_name = "Changed"
+        employee.save()
+        self.assertEqual(stored_token(employee), token)
+        self.assertIsInstance(employee.__dict__["sin_e"], Ciphertext)
+
+    def test_save_after_change_encrypts(self):
+        employee = Employee.all_objects.get(pk=self.employee.pk)
+        employee.sin_e = "130-692-544"
+        employee.save()
+        employee = Employee.all_objects.get(pk=self.employee.pk)
+        self.assertEqual(employee.sin_e, "130-692-544")
+
+    def test_values_list_returns_tokens(self):
+        (token,) = Employee.all_objects.values_list("sin_e", flat=True)
+        self.assertIsInstance(token, Ciphertext)
+        self.assertEqual(bulk_decrypt(Employee.all_objects.all()), [SIN])
+
+
+class KeysTests(SimpleTestCase):
+    def test_cached_per_secret_and_salt_keys(self):
+        with override_settings(
+            SECRET_KEY="a", SECRET_KEY_FALLBACKS=["b"], SALT_KEY="c"
+        ):
+            self.assertEqual(get_keys(), derive_keys(["a", "b"], ["c"]))
+            self.assertIs(get_keys(), get_keys())
+        with override_settings(
+            SECRET_KEY="a", SECRET_KEY_FALLBACKS=[], SALT_KEY=["b", "c"]
+        ):
+            self.assertEqual(get_keys(), derive_keys(["a"], ["b", "c"]))
+
+
+class IdAllocatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+
+    def setUp(self):
+        # The allocators are per process: start every test from the table.
+        Employee.sync_id_allocators()
+
+    def test_next_id_unique(self):
+        ids = [Employee.next_iss_iat_id() for _ in range(25)]
+        self.assertEqual(len(set(ids)), 25)
+        reserved = Employee.reserve_iss_iat_ids(30)
+        self.assertEqual(len(set(reserved)), 30)
+        self.assertFalse(set(ids) & set(reserved))
+
+    def test_continues_after_explicit_ids(self):
+        Employee.objects.create(email="a@example.com", iss_iat_id=500, mss_id=70)
+        Employee.sync_id_allocators()
+        # PostgreSQL sequences aren't rolled back between tests, so they may
+        # already be further.
+        self.assertGreater(Employee.next_iss_iat_id(), 500)
+        self.assertGreater(min(Employee.reserve_mss_ids(2)), 70)
+
+
+class PopulateEmployeesTestCase(TestCase):
+    # populate_employees options selecting the import path under test.
+    mode = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        Employee.objects.create(email="existing@example.com", first_name="Old")
+
+    def populate(self, rows, **options):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        path = directory / "employees.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        out = io.StringIO()
+        call_command(
+            "populate_employees", str(path), stdout=out, **self.mode, **options
+        )
+        rejects = directory / "employees.rejects.csv"
+        if not rejects.exists():
+            return out.getvalue(), []
+        with open(rejects, newline="") as f:
+            return out.getvalue(), list(csv.DictReader(f))
+
+
+class PopulateEmployeesBulkTests(PopulateEmployeesTestCase):
+    mode = {"bulk": True}
+
+    def test_upserts_on_email(self):
+        output, rejects = self.populate(
+            [
+                {"email": "new@example.com", "first_name": "First"},
+                {
+                    "email": "released@example.com",
+                    "status_id": Status.FULLTIME_ID,
+                    "date_released": "2024-01-31",
+                },
+                {"email": "existing@example.com", "first_name": "New"},
+                {"email": "new@example.com", "first_name": "Second"},
+            ]
+        )
+        self.assertIn("Created: 2", output)
+        self.assertIn("Updated: 2", output)
+        self.assertEqual(rejects, [])
+        self.assertEqual(
+            Employee.all_objects.get(email="existing@example.com").first_name, "New"
+        )
+        # Later rows win when an email repeats.
+        self.assertEqual(
+            Employee.all_objects.get(email="new@example.com").first_name, "Second"
+        )
+        # save()'s invariants hold without save().
+        released = Employee.all_objects.get(email="released@example.com")
+        self.assertEqual(released.status_id, Status.INACTIVE_ID)
+        self.assertEqual(released.geography.name, "NS")
+
+    def test_rejects_file(self):
+        output, rejects = self.populate(
+            [
+                {"email": "a@example.com", "iss_iat_id": "7"},
+                {"email": ""},
+                {"email": "b@example.com", "city_id": "999"},
+                # Fails its batch, which is then retried row by row.
+                {"email": "c@example.com", "iss_iat_id": "7"},
+                {"email": "d@example.com"},
+            ],
+            batch_size=2,
+        )
+        self.assertIn("Created: 2", output)
+        self.assertIn("Skipped: 1", output)
+        self.assertIn("Errors: 2", output)
+        self.assertEqual([row["row"] for row in rejects], ["3", "4", "5"])
+        self.assertEqual(rejects[0]["error"], "Skipped - no email provided")
+        self.assertIn("Unknown city id: 999", rejects[1]["error"])
+        self.assertEqual(rejects[2]["email"], "c@example.com")
+        self.assertEqual(
+            set(Employee.all_objects.values_list("email", flat=True)),
+            {"existing@example.com", "a@example.com", "d@example.com"},
+        )
+
+    def test_sins_encrypted_on_import(self):
+        self.populate(
+            [
+                {"email": "a@example.com", "sin": SIN},
+                {"email": "b@example.com", "sin": "130-692-544"},
+            ],
+            no_plaintext_sin=True,
+        )
+        employee = Employee.all_objects.get(email="a@example.com")
+        self.assertEqual(employee.sin, "")
+        self.assertNotIn("454", stored_token(employee))
+        self.assertEqual(employee.sin_e, SIN)
+        self.assertEqual(list(Employee.objects.filter_by_sin(SIN)), [employee])
+        self.assertEqual(
+            Employee.all_objects.get(email="b@example.com").sin_e, "130-692-544"
+        )
+
+    def test_allocator_continues_after_imported_ids(self):
+        self.populate([{"email": "a@example.com", "iss_iat_id": "4000"}])
+        self.assertGreater(Employee.next_iss_iat_id(), 4000)
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL only")
+class PopulateEmployeesCopyTests(PopulateEmployeesTestCase):
+    mode = {"copy": True}
+
+    def test_merges_staged_rows(self):
+        Employee.objects.create(email="taken@example.com", iss_iat_id=7)
+        output, rejects = self.populate(
+            [
+                {"email": "new@example.com", "first_name": "First", "sin": SIN},
+                {"email": "existing@example.com", "first_name": "New"},
+                {"email": "", "first_name": "Nobody"},
+                {"email": "bad@example.com", "city_id": "999"},
+                {"email": "conflict@example.com", "iss_iat_id": "7"},
+                {
+                    "email": "new@example.com",
+                    "first_name": "Second",
+                    "sin": SIN,
+                    "iss_iat_id": "4000",
+                },
+            ]
+        )
+        self.assertIn("Created: 1", output)
+        self.assertIn("Updated: 2", output)
+        self.assertIn("Skipped: 1", output)
+        self.assertIn("Errors: 2", output)
+        self.assertEqual(
+            sorted((row["row"], row["error"]) for row in rejects),
+            [
+                ("4", "Skipped - no email provided"),
+                ("5", "Unknown city id: 999"),
+                ("6", "iss_iat_id 7 is used by another employee"),
+            ],
+        )
+
+        self.assertEqual(
+            Employee.all_objects.get(email="existing@example.com").first_name, "New"
+        )
+        # Later rows win when an email repeats.
+        new = Employee.all_objects.get(email="new@example.com")
+        self.assertEqual(new.first_name, "Second")
+        self.assertEqual(new.sin_e, SIN)
+        self.assertEqual(list(Employee.objects.filter_by_sin(SIN)), [new])
+        self.assertEqual(new.geography.name, "NS")
+        self.assertFalse(Employee.all_objects.filter(email="conflict@example.com"))
+        self.assertGreater(Employee.next_iss_iat_id(), 4000)
+
+
+class EmployeeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.alice = Employee.objects.create(
+            email="alice@example.com",
+            first_name="Alice",
+            phone_number="902-555-0199",
+            sin_e=SIN,
+        )
+        cls.bob = Employee.objects.create(
+            email="bob@example.com", first_name="Bob", phone_number="(902) 444 1234"
+        )
+
+    def search(self, term):
+        model_admin = admin.site._registry[Employee]
+        results, _ = model_admin.get_search_results(
+            RequestFactory().get("/"), Employee.objects.all(), term
+        )
+        return set(results)
+
+    def test_filter_by_phone_ignores_formatting(self):
+        self.assertEqual(
+            list(Employee.objects.filter_by_phone("902 555")), [self.alice]
+        )
+        self.assertEqual(
+            list(Employee.objects.filter_by_phone("902.444.1234")), [self.bob]
+        )
+        self.assertFalse(Employee.objects.filter_by_phone("no digits").exists())
+
+    def test_admin_search(self):
+        self.assertEqual(self.search("ali"), {self.alice})
+        self.assertEqual(self.search("bob@example"), {self.bob})
+        self.assertEqual(self.search("046 454 286"), {self.alice})
+        self.assertEqual(self.search("555-01"), {self.alice})
+        self.assertEqual(self.search("902"), {self.alice, self.bob})
+        self.assertEqual(self.search("nobody"), set())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        for i in range(6):
+            Employee.objects.create(email=f"{i}@example.com")
+
+    def count(self, queryset, estimate):
+        class Paginator(EstimatedCountPaginator):
+            threshold = 3
+
+        # The estimates are PostgreSQL's: stand in for them on any database.
+        with (
+            mock.patch.object(connections[queryset.db], "vendor", "postgresql"),
+            mock.patch("utils.helpers.estimate_count", return_value=estimate),
+        ):
+            return Paginator(queryset.order_by("pk"), 10).count
+
+    @skipIf(connection.vendor == "postgresql", "estimates on PostgreSQL")
+    def test_exact_on_other_databases(self):
+        paginator = EstimatedCountPaginator(Employee.objects.order_by("pk"), 10)
+        self.assertEqual(paginator.count, 6)
+
+    def test_table_estimated_above_threshold(self):
+        self.assertEqual(self.count(Employee.objects.all(), 1000), 1000)
+        self.assertEqual(self.count(Employee.objects.all(), 3), 3)
+        # Below the threshold, or never analyzed: COUNT(*) is cheap enough.
+        self.assertEqual(self.count(Employee.objects.all(), 2), 6)
+        self.assertEqual(self.count(Employee.objects.all(), None), 6)
+
+    def test_filtered_exact_up_to_threshold(self):
+        few = Employee.objects.filter(email__in=["0@example.com", "1@example.com"])
+        self.assertEqual(self.count(few, 1000), 2)
+        matching = Employee.objects.filter(email__endswith="@example.com")
+        self.assertEqual(self.count(matching, 1000), 1000)
+        # The estimate is never below what was counted.
+        self.assertEqual(self.count(matching, 1), 4)
+        self.assertEqual(self.count(matching.distinct(), 1), 4)
+        self.assertEqual(self.count(matching, None), 6)
+
+
+class LocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.admin = Employee.objects.create_superuser("admin@example.com", "x")
+        Employee.objects.create(email="a@example.com", address="1 main st")
+
+    def test_full_address_with_location(self):
+        employee = Employee.objects.with_location().get(email="a@example.com")
+        with self.assertNumQueries(0):
+            self.assertEqual(employee.full_address(), "1 main st, Halifax, NS")
+
+    def test_changelist_queries_dont_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin:employees_employee_changelist")
+
+        def queries():
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(context)
+
+        before = queries()
+        for i in range(10):
+            Employee.objects.create(email=f"{i}@example.com")
+        self.assertEqual(queries(), before)
+
+
+class ExportEmployeesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        Employee.objects.create(email="encrypted@example.com", sin_e=SIN)
+        Employee.objects.create(email="plaintext@example.com", sin="964-716-062")
+        Employee.objects.create(email="both@example.com", sin="", sin_e="130-692-544")
+        Employee.objects.create(email="none@example.com")
+
+    def sins(self):
+        return {
+            employee.email: employee.sin_e or employee.sin or ""
+            for employee in Employee.all_objects.all()
+        }
+
+    def test_round_trip(self):
+        sins = self.sins()
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "export.csv"
+        call_command("export_employees", str(path), decrypt_sin=True, verbosity=0)
+        with open(path, newline="") as f:
+            exported = {row["email"]: row["sin"] for row in csv.DictReader(f)}
+        self.assertEqual(exported, sins)
+
+        Employee.all_objects.all().delete()
+        call_command("populate_employees", str(path), bulk=True, stdout=io.StringIO())
+        self.assertEqual(self.sins(), sins)
+        self.assertEqual(
+            list(Employee.objects.filter_by_sin("964716062").values_list("email")),
+            [("plaintext@example.com",)],
+        )
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.staff = Employee.objects.create_user(
+            "staff@example.com", "x", is_staff=True
+        )
+        cls.employees = [
+            Employee.objects.create(email=f"{i}@example.com", sin_e=SIN)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        # Records outlive the rolled back rows, whose pks get reused.
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def test_authentication_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("api-employee-list"))
+        self.assertEqual(response.status_code, 401)
+        self.client.force_login(Employee.objects.create_user("user@example.com", "x"))
+        response = self.client.get(reverse("api-employee-list"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_read_only(self):
+        response = self.client.post(reverse("api-employee-list"))
+        self.assertEqual(response.status_code, 405)
+
+    def test_list_pages(self):
+        url = reverse("api-employee-list")
+        response = self.client.get(url, {"limit": 2})
+        data = response.json()
+        self.assertEqual(
+            [record["id"] for record in data["results"]],
+            [self.staff.pk, self.employees[0].pk],
+        )
+        self.assertNotIn("sin_e", data["results"][0])
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(
+            [record["id"] for record in data["results"]],
+            [employee.pk for employee in self.employees[1:]],
+        )
+        self.assertIsNone(data["next"])
+
+    def test_bad_parameters(self):
+        url = reverse("api-employee-list")
+        for params in ({"limit": "abc"}, {"limit": 0}, {"after": "x"}, {"city": "x"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("detail", response.json())
+
+    def test_etag(self):
+        url = reverse("api-employee-detail", args=[self.employees[0].pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()["email"], "0@example.com")
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.employees[0].first_name = "Changed"
+        self.employees[0].save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_not_found(self):
+        response = self.client.get(reverse("api-employee-detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_reference_lists(self):
+        response = self.client.get(reverse("api-geography-list"))
+        self.assertEqual([g["name"] for g in response.json()["results"]], ["NS"])
+        response = self.client.get(reverse("api-city-list"))
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": City.HALIFAX_ID, "name": "Halifax", "province": "NS"}],
+        )
+
+
+class EmployeeRecordCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.employee = Employee.objects.create(
+            email="a@example.com", first_name="Old", address="1 main st", sin_e=SIN
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached(self):
+        record = employee_cache.get_record(self.employee.pk)
+        self.assertEqual(record["full_address"], "1 main st, Halifax, NS")
+        self.assertNotEqual(record["sin_e"], SIN)
+        with self.assertNumQueries(0):
+            self.assertEqual(employee_cache.get_record(self.employee.pk), record)
+
+    def test_save_invalidates(self):
+        employee_cache.get_record(self.employee.pk)
+        self.employee.first_name = "New"
+        self.employee.save()
+        self.assertEqual(
+            employee_cache.get_record(self.employee.pk)["first_name"], "New"
+        )
+
+    def test_delete_invalidates(self):
+        employee_cache.get_record(self.employee.pk)
+        pk = self.employee.pk
+        Employee.all_objects.get(pk=pk).delete()
+        self.assertIsNone(employee_cache.get_record(pk))
+
+    def test_bulk_update_invalidate_all(self):
+        employee_cache.get_record(self.employee.pk)
+        Employee.all_objects.update(first_name="Bulk")
+        employee_cache.invalidate_all()
+        self.assertEqual(
+            employee_cache.get_record(self.employee.pk)["first_name"], "Bulk"
+        )
+
+    def test_city_rename_invalidates(self):
+        employee_cache.get_record(self.employee.pk)
+        city = City.objects.get(pk=City.HALIFAX_ID)
+        city.name = "Dartmouth"
+        city.save()
+        self.assertEqual(
+            employee_cache.get_record(self.employee.pk)["city"], "Dartmouth, NS"
+        )
+
+    def test_sins_for_authorized_users(self):
+        user = Employee.objects.create_user("staff@example.com", "x", is_staff=True)
+        self.client.force_login(user)
+        url = reverse("api-employee-detail", args=[self.employee.pk])
+        self.assertNotIn("sin", self.client.get(url).json())
+        self.assertEqual(self.client.get(url, {"sin": 1}).status_code, 403)
+
+        user.user_permissions.add(Permission.objects.get(codename="change_employee"))
+        self.client.force_login(Employee.objects.get(pk=user.pk))
+        self.assertEqual(self.client.get(url, {"sin": 1}).json()["sin"], SIN)
+        response = self.client.get(reverse("api-employee-list"), {"sin": 1})
+        self.assertEqual(
+            {record["email"]: record["sin"] for record in response.json()["results"]},
+            {"a@example.com": SIN, "staff@example.com": None},
+        )
+
+
+class GenerateEmployeesTests(TestCase):
+    def test_csv_needs_no_database(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "gen.csv"
+        with self.assertNumQueries(0):
+            call_command(
+                "generate_employees",
+                count=50,
+                csv=str(path),
+                start_id=9000,
+                workers=1,
+                stdout=io.StringIO(),
+            )
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(len({row["email"] for row in rows}), 50)
+        for column in ("iss_iat_id", "mss_id"):
+            ids = [int(row[column]) for row in rows if row[column]]
+            self.assertEqual(sorted(ids), list(range(9000, 9000 + len(ids))))
+
+
+@override_settings(
+    REQUEST_PROFILING_SAMPLE_RATE=1, REQUEST_PROFILING_SERVER_TIMING=True
+)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_reference_data()
+        cls.staff = Employee.objects.create_user(
+            "staff@example.com", "x", is_staff=True
+        )
+        for i in range(3):
+            Employee.objects.create(email=f"{i}@example.com", sin_e=SIN)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_signature(self):
+        self.assertEqual(
+            signature("SELECT 1 WHERE id IN (%s, %s, %s) AND x = %s"),
+            "SELECT 1 WHERE id IN (%s, ...) AND x = %s",
+        )
+
+    def test_profiling(self):
+        with profiling() as profile:
+            for employee in Employee.all_objects.order_by("pk"):
+                employee.sin_e
+                employee.status.name
+        self.assertEqual(profile.queries, 5)
+        # The N+1: one status query per employee.
+        ((sql, count),) = profile.duplicates()
+        self.assertIn("employees_status", sql)
+        self.assertEqual(count, 4)
+        self.assertEqual(profile.crypto["decrypt"][0], 3)
+        self.assertEqual(profile.crypto["encrypt"][0], 0)
+
+    def test_middleware(self):
+        self.client.force_login(self.staff)
+        with self.assertLogs("utils.profiling") as logs:
+            response = self.client.get(reverse("api-employee-list"))
+        self.assertEqual(response.status_code, 200)
+        (message,) = logs.records
+        record = json.loads(message.getMessage())
+        self.assertEqual(record["path"], reverse("api-employee-list"))
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertEqual(record["fernet_decrypts"], 0)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn('desc="%d queries' % record["queries"], response["Server-Timing"])
+
+    async def test_async_view_queries_counted(self):
+        await self.async_client.aforce_login(self.staff)
+        with self.assertLogs("utils.profiling") as logs:
+            await self.async_client.get(reverse("api-employee-list"))
+        record = json.loads(logs.records[0].getMessage())
+        # Session, user, ids and records: made from the view's own thread.
+        self.assertGreaterEqual(record["queries"], 4)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        self.client.force_login(self.staff)
+        with self.assertNoLogs("utils.profiling"):
+            response = self.client.get(reverse("api-employee-list"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class CryptoHooksTests(SimpleTestCase):
+    def test_histogram_buckets(self):
+        stats = crypto_hooks.Stats()
+        for seconds in (0.000005, 0.00001, 0.0003, 5.0):
+            stats.record("decrypt", "field", seconds)
+        stats.record("decrypt", "field", 0.0003, error=True)
+        (row,) = stats.snapshot()
+        self.assertEqual(row["count"], 5)
+        self.assertEqual(row["errors"], 1)
+        self.assertEqual(row["max_seconds"], 5.0)
+        buckets = dict(zip(crypto_hooks.BUCKETS, row["buckets"]))
+        self.assertEqual(buckets[0.00001], 2)
+        self.assertEqual(buckets[0.0005], 2)
+        self.assertEqual(buckets[float("inf")], 1)
+        self.assertEqual(crypto_hooks.percentile(row, 0.5), 0.0005)
+        self.assertEqual(crypto_hooks.percentile(row, 0.99), 5.0)
+
+    def test_merge(self):
+        parent, worker = crypto_hooks.Stats(), crypto_hooks.Stats()
+        parent.record("encrypt", "field", 0.00002)
+        worker.record("encrypt", "field", 0.002)
+        worker.record("encrypt", None, 0.00002)
+        parent.merge(worker.snapshot(reset=True))
+        self.assertEqual(worker.snapshot(), [])
+        rows = {row["field"]: row for row in parent.snapshot()}
+        self.assertEqual(rows[None]["count"], 1)
+        self.assertEqual(rows["field"]["count"], 2)
+        self.assertAlmostEqual(rows["field"]["seconds"], 0.00202)
+        self.assertEqual(rows["field"]["max_seconds"], 0.002)
+        self.assertEqual(sum(rows["field"]["buckets"]), 2)
+
+    def test_callbacks(self):
+        calls = []
+
+        def callback(operation, field, seconds, error):
+            calls.append((operation, field, error))
+
+        fernet = TimedFernet(Fernet(Fernet.generate_key()), "field")
+        crypto_hooks.add_callback(callback)
+        try:
+            fernet.decrypt(fernet.encrypt(b"046454286"))
+            with self.assertRaises(InvalidToken):
+                fernet.decrypt(b"not a token")
+        finally:
+            crypto_hooks.remove_callback(callback)
+        fernet.encrypt(b"046454286")
+        self.assertEqual(
+            calls,
+            [
+                ("encrypt", "field", False),
+                ("decrypt", "field", False),
+                ("decrypt", "field", True),
+            ],
+        )
+
+    def test_crypto_stats_command(self):
+        out = io.StringIO()
+        call_command("crypto_stats", "--json", "--reset", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["stats"], [])
+
+        field = Employee._meta.get_field("sin_e")
+        field.f.decrypt(field.f.encrypt(b"046454286"))
+        out = io.StringIO()
+        call_command("crypto_stats", stdout=out)
+        self.assertIn("employees.Employee.sin_e", out.getvalue())
+        self.assertIn("Percentiles are histogram bucket upper bounds", out.getvalue())
@@ -1,3 +1,107 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
 
-# Create your views here.
+from utils.api import api_view, json_response, next_url, page_params
+from utils.reference import reference_data
+
+from . import cache
+from .models import Employee, Geography
+
+# Users who can edit employees, and so see their SIN in the admin, get them
+# decrypted from the API with ?sin=1.
+SIN_PERMISSION = "employees.change_employee"
+
+
+def public(record):
+    # Directory fields only: the SIN token stays out of API responses.
+    return {key: value for key, value in record.items() if key != "sin_e"}
+
+
+async def sins_requested(request):
+    """
+    Whether the request asks for decrypted SINs. Raises PermissionDenied when
+    the user isn't allowed them.
+    """
+    if request.GET.get("sin") not in ("1", "true"):
+        return False
+    user = await request.auser()
+    if not await user.ahas_perm(SIN_PERMISSION):
+        raise PermissionDenied
+    return True
+
+
+@api_view
+async def employee_list(request):
+    """
+    Employees in pk order, a page at a time: follow `next` (or pass
+    ?after=<last id>) for the following page. Filters: ?active=1|0,
+    ?geography=<id>, ?city=<id>, ?status=<id>. ?sin=1 adds the decrypted
+    SINs, for users with SIN_PERMISSION.
+    """
+    sins = await sins_requested(request)
+    try:
+        after, limit = page_params(request)
+        filters = {
+            "%s_id" % name: int(request.GET[name])
+            for name in ("geography", "city", "status")
+            if request.GET.get(name)
+        }
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+
+    queryset = Employee.objects.filter(**filters)
+    active = request.GET.get("active")
+    if active:
+        queryset = queryset.active() if active in ("1", "true") else queryset.inactive()
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+
+    # Only the ids come from the database, the records from the cache.
+    pks = [pk async for pk in queryset[: limit + 1]]
+    more = len(pks) > limit
+    pks = pks[:limit]
+    records = await sync_to_async(cache.get_records)(pks)
+    results = [records[pk] for pk in pks if pk in records]
+    if sins:
+        results = await sync_to_async(cache.with_sins)(results)
+    results = [public(record) for record in results]
+    # No Last-Modified: rows leaving the page (deleted, or no longer matching
+    # the filters) don't raise the newest modified date of the ones left.
+    return json_response(
+        request,
+        {
+            "results": results,
+            "next": next_url(request, pks[-1]) if more else None,
+        },
+    )
+
+
+@api_view
+async def employee_detail(request, pk):
+    sins = await sins_requested(request)
+    record = await sync_to_async(cache.get_record)(pk)
+    if record is None:
+        raise Http404("No employee matches the given query.")
+    if sins:
+        (record,) = await sync_to_async(cache.with_sins)([record])
+    # No Last-Modified: the record also embeds city, province and status
+    # names, which change without touching employee.modified. The ETag
+    # covers them.
+    return json_response(request, public(record))
+
+
+@api_view
+async def geography_list(request):
+    # A handful of rows, served from the reference data cache.
+    geographies = await sync_to_async(reference_data.all)(Geography)
+    return json_response(
+        request,
+        {
+            "results": [
+                {"id": g.pk, "name": g.name, "timezone": g.timezone}
+                for g in geographies
+            ]
+        },
+    )
@@ -12,6 +12,9 @@ class CityAdmin(ModelAdmin):
     ]
     search_fields = ["name", "province__name"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_location()
+
 
 class ProvinceAdmin(ModelAdmin):
     list_display = ["name", "abbreviation"]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MiscConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'misc'
+
+    def ready(self):
+        from utils.reference import reference_data
+
+        reference_data.register(self.get_model('Province'), 'name', 'abbreviation')
+        reference_data.register(self.get_model('City'), 'name')
+        reference_data.register(self.get_model('Relationship'), 'name')
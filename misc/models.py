@@ -1,5 +1,7 @@
 from django.db import models
 
+from utils.reference import reference_data
+
 
 class Province(models.Model):
     name = models.CharField(max_length=32, unique=True)
@@ -12,18 +14,37 @@ class Province(models.Model):
         return self.name
 
 
+class CityQuerySet(models.QuerySet):
+    def with_location(self):
+        """
+        Join the province, so str() of the cities needs nothing else.
+        """
+        return self.select_related("province")
+
+
 class City(models.Model):
     HALIFAX_ID = 1
 
     name = models.CharField(max_length=32, unique=True)
     province = models.ForeignKey(Province, models.PROTECT)
 
+    objects = CityQuerySet.as_manager()
+
     class Meta:
         ordering = ["name"]
         verbose_name_plural = "cities"
 
     def __str__(self):
-        return "%s, %s" % (self.name, self.province.abbreviation)
+        return "%s, %s" % (self.name, self.cached_province().abbreviation)
+
+    def cached_province(self):
+        """
+        The province joined by with_location(), or the one in the reference
+        data cache: never a query per city.
+        """
+        if City.province.is_cached(self):
+            return self.province
+        return reference_data.get(Province, self.province_id)
 
 
 class Relationship(models.Model):
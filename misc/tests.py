@@ -1,3 +1,48 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from utils.reference import reference_data
+
+from .models import City, Province
+
+
+class CityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.province = Province.objects.create(name="Nova Scotia", abbreviation="NS")
+        cls.city = City.objects.create(name="Halifax", province=cls.province)
+
+    def setUp(self):
+        # Rolling back a test doesn't invalidate the reference data cache.
+        reference_data.invalidate()
+
+    def test_str_uses_reference_data(self):
+        city = City.objects.get(pk=self.city.pk)
+        str(city)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(city), "Halifax, NS")
+
+    def test_str_with_location(self):
+        (city,) = City.objects.with_location()
+        with self.assertNumQueries(0):
+            self.assertEqual(str(city), "Halifax, NS")
+
+    def test_province_change_invalidates(self):
+        city = City.objects.get(pk=self.city.pk)
+        self.assertEqual(str(city), "Halifax, NS")
+        self.province.abbreviation = "XX"
+        self.province.save()
+        self.assertEqual(str(city), "Halifax, XX")
+
+    def test_invalidated_by_other_process(self):
+        city = City.objects.get(pk=self.city.pk)
+        self.assertEqual(str(city), "Halifax, NS")
+        # Another process changing the province: no signal here, only the
+        # version in the shared cache moves.
+        Province.objects.filter(pk=self.province.pk).update(abbreviation="XX")
+        cache.incr(reference_data._version_key(Province))
+        self.assertEqual(str(city), "Halifax, NS")
+        with mock.patch("utils.reference.CHECK_INTERVAL", 0):
+            self.assertEqual(str(city), "Halifax, XX")
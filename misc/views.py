@@ -0,0 +1,27 @@
+from asgiref.sync import sync_to_async
+
+from utils.api import api_view, json_response
+from utils.reference import reference_data
+
+from .models import City, Province
+
+
+@api_view
+async def city_list(request):
+    # Served from the reference data cache, no query once it is loaded.
+    cities = await sync_to_async(reference_data.all)(City)
+    provinces = await sync_to_async(reference_data.all)(Province)
+    abbreviations = {province.pk: province.abbreviation for province in provinces}
+    return json_response(
+        request,
+        {
+            "results": [
+                {
+                    "id": city.pk,
+                    "name": city.name,
+                    "province": abbreviations[city.province_id],
+                }
+                for city in cities
+            ]
+        },
+    )
@@ -0,0 +1,73 @@
+"""
+Helpers for the read-only JSON API views.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def api_view(view):
+    """
+    Async GET/HEAD view for staff users, answering PermissionDenied with a
+    JSON 403 like the staff check. Read-only views stay out of
+    ATOMIC_REQUESTS, which would otherwise run them in a transaction (and
+    which Django doesn't support for async views anyway).
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication required."}, status=401)
+        if not user.is_staff:
+            return JsonResponse({"detail": "Permission denied."}, status=403)
+        try:
+            return await view(request, *args, **kwargs)
+        except PermissionDenied as e:
+            return JsonResponse({"detail": str(e) or "Permission denied."}, status=403)
+
+    return transaction.non_atomic_requests(require_safe(wrapper))
+
+
+def page_params(request):
+    """
+    The keyset pagination parameters of `request`: the pk to continue after
+    and the page size. Raises ValueError on malformed values.
+    """
+    after = request.GET.get("after")
+    limit = int(request.GET.get("limit", PAGE_SIZE))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return (int(after) if after else None), min(limit, MAX_PAGE_SIZE)
+
+
+def next_url(request, after):
+    params = request.GET.copy()
+    params["after"] = after
+    return request.build_absolute_uri("?" + params.urlencode())
+
+
+def json_response(request, data):
+    """
+    JSON response with an ETag of its content. A matching If-None-Match
+    header gets a 304 without the body.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+    etag = quote_etag(hashlib.md5(body, usedforsecurity=False).hexdigest())
+    response = get_conditional_response(request, etag=etag) or HttpResponse(
+        body, content_type="application/json"
+    )
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,46 @@
+"""
+Light colors for employees, drawn from a palette generated once per process.
+
+RandomColor loads and preprocesses its colormap on every instantiation, which
+adds up when a color is picked per saved or imported row. The palette is
+generated from a fixed seed, so it is the same in every process and
+color_for() gives reproducible results.
+"""
+
+import random
+import threading
+
+from randomcolor import RandomColor
+
+PALETTE_SIZE = 4096
+PALETTE_SEED = 0
+
+_lock = threading.Lock()
+_palette = None
+_random = random.Random()
+
+
+def palette():
+    global _palette
+    if _palette is None:
+        with _lock:
+            if _palette is None:
+                colors = RandomColor(seed=PALETTE_SEED).generate(
+                    luminosity="light", count=PALETTE_SIZE
+                )
+                _palette = [color.lstrip("#") for color in colors]
+    return _palette
+
+
+def assign_colors(n):
+    """
+    `n` random light colors, as hex strings without the leading "#".
+    """
+    return _random.choices(palette(), k=n)
+
+
+def color_for(key):
+    """
+    The light color of integer `key` (typically a pk), always the same one.
+    """
+    return palette()[key % PALETTE_SIZE]
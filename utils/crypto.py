@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import itertools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import InvalidToken
+from django.db.models import (
+    Case,
+    ExpressionWrapper,
+    F,
+    QuerySet,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.lookups import Exact
+
+from utils import crypto_hooks
+from utils.fields import Ciphertext
+from utils.keys import TimedFernet, build_fernet, get_blind_index_key, get_fernet
+
+
+def blind_index(value, key=None):
+    """
+    Deterministic HMAC-SHA256 of an identifier such as a SIN, for exact
+    lookups on data that is otherwise only stored encrypted. Only the digits
+    are kept so "046 454 286" and "046-454-286" share an index.
+    """
+    digits = re.sub(r"\D", "", value or "")
+    if not digits:
+        return None
+    key = key or get_blind_index_key()
+    return hmac.new(key, digits.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+# Fernet instance and blind index key of a process pool worker, set up by
+# init_worker().
+_worker_fernet = None
+_worker_index_key = None
+
+
+def init_worker(keys, index_key, field=None):
+    """
+    ProcessPoolExecutor initializer. Only the derived keys cross the process
+    boundary so workers never need Django settings or a database connection.
+    Operations are recorded against `field`, see pool_encrypt_rows().
+    """
+    global _worker_fernet, _worker_index_key
+    _worker_fernet = TimedFernet(build_fernet(keys), field)
+    _worker_index_key = index_key
+    # Forked workers start with a copy of the parent's stats.
+    crypto_hooks.stats.reset()
+
+
+def encrypt_rows(rows, fernet=None, index_key=None):
+    """
+    Encrypt a batch of (pk, value) pairs, with `fernet` and `index_key` or,
+    inside a pool worker, the ones set up by init_worker().
+
+    Returns (pk, token, index, error) tuples so that one bad value is
+    reported on its own instead of failing the whole batch.
+    """
+    fernet = fernet or _worker_fernet
+    index_key = index_key or _worker_index_key
+    results = []
+    for pk, value in rows:
+        try:
+            token = fernet.encrypt(str(value).encode("utf-8")).decode("utf-8")
+        except Exception as e:
+            results.append((pk, None, None, str(e)))
+        else:
+            results.append((pk, token, blind_index(value, index_key), None))
+    return results
+
+
+def pool_encrypt_rows(rows):
+    """
+    encrypt_rows() in a pool worker, also returning the worker's
+    crypto_hooks stats since the previous call for the parent to merge.
+    """
+    return encrypt_rows(rows), crypto_hooks.stats.snapshot(reset=True)
+
+
+def rotate_rows(rows, fernet, current, index_key):
+    """
+    Re-encrypt (pk, token) pairs with the primary key of MultiFernet
+    `fernet`, and recompute their blind index with `index_key`. Tokens that
+    `current` (the new keys only) can already decrypt are left out, which
+    makes an interrupted rotation cheap to re-run.
+
+    Returns (pk, token, index, error) tuples for the rows that needed
+    rotating.
+    """
+    results = []
+    for pk, token in rows:
+        token = token.encode("utf-8")
+        try:
+            current.decrypt(token)
+            continue
+        except InvalidToken:
+            pass
+        try:
+            value = fernet.decrypt(token)
+        except InvalidToken:
+            results.append((pk, None, None, "not decryptable with the old or new keys"))
+            continue
+        results.append(
+            (
+                pk,
+                current.encrypt(value).decode("utf-8"),
+                blind_index(value.decode("utf-8"), index_key),
+                None,
+            )
+        )
+    return results
+
+
+def ciphertext(field_name):
+    """
+    Expression selecting the stored token of an encrypted field as is,
+    without the field decrypting it on the way out.
+    """
+    return ExpressionWrapper(F(field_name), output_field=TextField())
+
+
+def _by_pk(column):
+    # CASE pk WHEN ... THEN value END, with values as plain text.
+    return Case(
+        *[
+            When(pk=pk, then=Value(value, output_field=TextField()))
+            for pk, value in column.items()
+        ],
+        output_field=TextField(),
+    )
+
+
+def update_ciphertext(queryset, field_name, tokens, expected=None, **columns):
+    """
+    Write already encrypted `tokens` ({pk: token}) to `field_name` with a
+    single UPDATE. The values are passed as plain text expressions so the
+    encrypted field doesn't encrypt them a second time. Extra `columns`
+    ({field_name: {pk: value}}) are set by the same statement.
+
+    With `expected` ({pk: token}), rows whose stored token is no longer the
+    one that was read, e.g. edited in the meantime, are left alone. Returns
+    the number of rows updated.
+    """
+    if not tokens:
+        return 0
+    columns = {field_name: tokens, **columns}
+    queryset = queryset.filter(pk__in=list(tokens))
+    if expected:
+        queryset = queryset.filter(
+            Exact(ciphertext(field_name), _by_pk({pk: expected[pk] for pk in tokens}))
+        )
+    return queryset.update(**{name: _by_pk(column) for name, column in columns.items()})
+
+
+def _in_chunks(function, values, chunk_size, workers):
+    """
+    Apply `function` to `values` chunk by chunk on a thread pool, returning
+    the flattened results in input order. Fernet spends most of its time in
+    OpenSSL, which releases the GIL, so threads do run in parallel.
+    """
+    values = list(values)
+    chunks = [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+    if len(chunks) <= 1:
+        return [result for chunk in chunks for result in function(chunk)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return list(itertools.chain.from_iterable(executor.map(function, chunks)))
+
+
+def bulk_encrypt(values, chunk_size=1000, workers=None, fernet=None):
+    """
+    Encrypt many values without going through model instances.
+
+    Returns Ciphertext tokens in input order, None for empty values like the
+    encrypted fields do. Assigning a token to a LazyEncryptedCharField saves
+    it as is, so the work isn't repeated on save.
+    """
+    fernet = fernet or get_fernet()
+
+    def encrypt(chunk):
+        return [
+            (
+                Ciphertext(fernet.encrypt(str(value).encode("utf-8")).decode("utf-8"))
+                if value
+                else None
+            )
+            for value in chunk
+        ]
+
+    return _in_chunks(encrypt, values, chunk_size, workers)
+
+
+def bulk_decrypt(
+    queryset_or_tokens, field_name="sin_e", chunk_size=1000, workers=None, fernet=None
+):
+    """
+    Decrypt many tokens at once, in input order.
+
+    Accepts raw tokens (e.g. from .values_list("sin_e", flat=True)) or a
+    queryset, in which case the stored tokens of `field_name` are read in the
+    queryset's order without hydrating any model. Values that don't decrypt
+    are returned as is, like the encrypted fields do.
+    """
+    if isinstance(queryset_or_tokens, QuerySet):
+        fernet = fernet or queryset_or_tokens.model._meta.get_field(field_name).f
+        queryset_or_tokens = queryset_or_tokens.values_list(
+            ciphertext(field_name), flat=True
+        )
+    fernet = fernet or get_fernet()
+
+    def decrypt(chunk):
+        values = []
+        for token in chunk:
+            if token is None:
+                values.append(None)
+                continue
+            try:
+                values.append(fernet.decrypt(token.encode("utf-8")).decode("utf-8"))
+            except InvalidToken:
+                values.append(str(token))
+        return values
+
+    return _in_chunks(decrypt, queryset_or_tokens, chunk_size, workers)
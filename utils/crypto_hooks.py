@@ -0,0 +1,140 @@
+"""
+Hooks around every Fernet encrypt and decrypt call and every key derivation.
+
+Operations are reported to record() by the Fernet returned from
+utils.keys.get_fernet() and by utils.keys.derive_keys(), labelled with the
+encrypted field they were made for ("employees.Employee.sin_e") or None for
+direct calls. Each one is added to the process-wide `stats` (counters and
+latency histograms per operation and field, see the crypto_stats command)
+and passed to the callbacks registered with add_callback().
+
+Callbacks run inline on every operation, so they should be cheap.
+"""
+
+import bisect
+import math
+import threading
+
+OPERATIONS = ("encrypt", "decrypt", "derive")
+
+# Upper bounds of the latency histogram buckets, in seconds.
+BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.01,
+    0.1,
+    1.0,
+    math.inf,
+)
+
+_callbacks = []
+
+
+def add_callback(callback):
+    """
+    Call `callback(operation, field, seconds, error)` after every operation.
+    `error` is True when it raised, e.g. InvalidToken on decrypt.
+    """
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(operation, field): [count, errors, seconds, max, [bucket counts]]}
+        self._data = {}
+
+    def _entry(self, key):
+        try:
+            return self._data[key]
+        except KeyError:
+            entry = self._data[key] = [0, 0, 0.0, 0.0, [0] * len(BUCKETS)]
+            return entry
+
+    def record(self, operation, field, seconds, error=False):
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            entry = self._entry((operation, field))
+            entry[0] += 1
+            entry[1] += error
+            entry[2] += seconds
+            entry[3] = max(entry[3], seconds)
+            entry[4][bucket] += 1
+
+    def snapshot(self, reset=False):
+        """
+        The stats as a list of picklable, JSON-serializable dicts.
+        """
+        with self._lock:
+            data = sorted(
+                self._data.items(), key=lambda item: (item[0][0], item[0][1] or "")
+            )
+            if reset:
+                self._data = {}
+        rows = []
+        for (operation, field), entry in data:
+            count, errors, seconds, max_seconds, buckets = entry
+            rows.append(
+                {
+                    "operation": operation,
+                    "field": field,
+                    "count": count,
+                    "errors": errors,
+                    "seconds": seconds,
+                    "max_seconds": max_seconds,
+                    "buckets": list(buckets),
+                }
+            )
+        return rows
+
+    def merge(self, snapshot):
+        """
+        Add the snapshot() of another process, e.g. a pool worker.
+        """
+        with self._lock:
+            for row in snapshot:
+                entry = self._entry((row["operation"], row["field"]))
+                entry[0] += row["count"]
+                entry[1] += row["errors"]
+                entry[2] += row["seconds"]
+                entry[3] = max(entry[3], row["max_seconds"])
+                entry[4] = [a + b for a, b in zip(entry[4], row["buckets"])]
+
+    def reset(self):
+        with self._lock:
+            self._data = {}
+
+
+def percentile(row, q):
+    """
+    Upper bound of the histogram bucket holding the `q` (0-1) percentile of
+    a snapshot() row, capped by the slowest operation seen.
+    """
+    rank = q * row["count"]
+    seen = 0
+    for bound, count in zip(BUCKETS, row["buckets"]):
+        seen += count
+        if count and seen >= rank:
+            return min(bound, row["max_seconds"])
+    return row["max_seconds"]
+
+
+stats = Stats()
+
+
+def record(operation, field, seconds, error=False):
+    stats.record(operation, field, seconds, error)
+    for callback in _callbacks:
+        callback(operation, field, seconds, error)
@@ -0,0 +1,67 @@
+from django.db.models.query_utils import DeferredAttribute
+from encrypted_fields.fields import EncryptedCharField
+
+from utils.keys import get_fernet, get_keys
+
+
+class Ciphertext(str):
+    """
+    A token as it was read from the database, not decrypted yet.
+    """
+
+
+class LazyDecryptAttribute(DeferredAttribute):
+    """
+    Decrypts the stored token the first time the attribute is read and keeps
+    the plaintext on the instance from then on.
+    """
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, Ciphertext):
+            value = self.field.to_python(str(value))
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    # Defining __set__ makes this a data descriptor, so reads keep going
+    # through __get__ even though the value lives in the instance __dict__.
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class LazyEncryptedCharField(EncryptedCharField):
+    """
+    EncryptedCharField that only decrypts on attribute access.
+
+    Loading rows keeps the ciphertext, so querysets that never read the
+    value (the admin changelist, bulk iteration, auth lookups) don't pay for
+    Fernet. Saving an instance whose value was never read writes the stored
+    token back unchanged instead of encrypting it again. Note that
+    .values()/.values_list() return the Ciphertext tokens.
+    """
+
+    descriptor_class = LazyDecryptAttribute
+
+    # Share the process-wide keys instead of deriving them per field.
+    @property
+    def keys(self):
+        return get_keys()
+
+    @property
+    def f(self):
+        return get_fernet().for_field(str(self))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Ciphertext(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the instance __dict__ directly: going through the descriptor
+        # would decrypt a token that is about to be written back as is.
+        return model_instance.__dict__[self.attname]
+
+    def get_prep_value(self, value):
+        if isinstance(value, Ciphertext):
+            return str(value)
+        return super().get_prep_value(value)
@@ -0,0 +1,187 @@
+"""
+Process-wide key provider for the encrypted fields.
+
+PBKDF2 key derivation is deliberately slow, and encrypted_fields caches the
+result per field, so every worker process used to pay for it on its first
+encrypted read. Keys are derived here once per process instead, shared by
+every encrypted field and warmed up from EmployeesConfig.ready().
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+
+from cryptography.fernet import Fernet, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from django.conf import settings
+
+from utils import crypto_hooks
+
+logger = logging.getLogger(__name__)
+
+# Key derivation timings of this process, in seconds.
+metrics = {"derivations": 0, "derivation_seconds": 0.0, "warm_up_seconds": None}
+
+_lock = threading.RLock()
+_cache = {}
+
+
+def derive_keys(secret_keys, salt_keys):
+    """
+    Derive Fernet keys the same way encrypted_fields does: PBKDF2 over every
+    secret key / salt key combination, in that order.
+    """
+    keys = []
+    for secret_key in secret_keys:
+        for salt_key in salt_keys:
+            started = time.perf_counter()
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt_key.encode("utf-8"),
+                iterations=100_000,
+            )
+            keys.append(
+                base64.urlsafe_b64encode(kdf.derive(secret_key.encode("utf-8")))
+            )
+            crypto_hooks.record("derive", None, time.perf_counter() - started)
+    return keys
+
+
+def blind_index_key(secret_key, salt_key):
+    """
+    Key for blind indexes, kept separate from the Fernet keys derived from
+    the same secrets.
+    """
+    return hmac.new(
+        secret_key.encode("utf-8"),
+        b"blind-index:" + salt_key.encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+
+
+def build_fernet(keys):
+    """
+    Build the same Fernet/MultiFernet an encrypted field would use for `keys`.
+    """
+    if len(keys) == 1:
+        return Fernet(keys[0])
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+class TimedFernet:
+    """
+    Fernet/MultiFernet proxy reporting its encrypt and decrypt calls to
+    utils.crypto_hooks, against `field` when given.
+    """
+
+    def __init__(self, fernet, field=None):
+        self.fernet = fernet
+        self.field = field
+        self._bound = {}
+
+    def for_field(self, field):
+        """
+        The same keys, with their operations recorded against `field`, a
+        label such as "employees.Employee.sin_e".
+        """
+        try:
+            return self._bound[field]
+        except KeyError:
+            return self._bound.setdefault(field, TimedFernet(self.fernet, field))
+
+    def _timed(self, operation, function, *args):
+        started = time.perf_counter()
+        error = True
+        try:
+            result = function(*args)
+            error = False
+            return result
+        finally:
+            crypto_hooks.record(
+                operation, self.field, time.perf_counter() - started, error
+            )
+
+    def encrypt(self, data):
+        return self._timed("encrypt", self.fernet.encrypt, data)
+
+    def decrypt(self, token, ttl=None):
+        return self._timed("decrypt", self.fernet.decrypt, token, ttl)
+
+    def __getattr__(self, name):
+        return getattr(self.fernet, name)
+
+
+def salt_keys():
+    return (
+        settings.SALT_KEY
+        if isinstance(settings.SALT_KEY, list)
+        else [settings.SALT_KEY]
+    )
+
+
+def secret_keys():
+    return [settings.SECRET_KEY] + list(getattr(settings, "SECRET_KEY_FALLBACKS", []))
+
+
+def _cached(name, secrets, salts, factory):
+    # Keyed by the secrets and salts themselves so overridden settings get
+    # their own keys. Kept apart, as ["a", "b"] + ["c"] and ["a"] + ["b", "c"]
+    # derive different keys.
+    cache_key = (name, tuple(secrets), tuple(salts))
+    try:
+        return _cache[cache_key]
+    except KeyError:
+        pass
+    with _lock:
+        if cache_key not in _cache:
+            _cache[cache_key] = factory()
+        return _cache[cache_key]
+
+
+def get_keys():
+    """
+    Fernet keys for the current SECRET_KEY, SECRET_KEY_FALLBACKS and SALT_KEY.
+    """
+    secrets, salts = secret_keys(), salt_keys()
+
+    def derive():
+        started = time.perf_counter()
+        keys = derive_keys(secrets, salts)
+        elapsed = time.perf_counter() - started
+        metrics["derivations"] += 1
+        metrics["derivation_seconds"] += elapsed
+        logger.info("Derived %d Fernet keys in %.3fs", len(keys), elapsed)
+        return keys
+
+    return _cached("keys", secrets, salts, derive)
+
+
+def get_fernet():
+    return _cached(
+        "fernet",
+        secret_keys(),
+        salt_keys(),
+        lambda: TimedFernet(build_fernet(get_keys())),
+    )
+
+
+def get_blind_index_key():
+    secret, salt = settings.SECRET_KEY, salt_keys()[0]
+    return _cached(
+        "blind_index", [secret], [salt], lambda: blind_index_key(secret, salt)
+    )
+
+
+def warm_up():
+    """
+    Derive every key up front, so the first request a worker serves doesn't.
+    """
+    started = time.perf_counter()
+    get_fernet()
+    get_blind_index_key()
+    metrics["warm_up_seconds"] = time.perf_counter() - started
@@ -0,0 +1,211 @@
+"""
+Per-request profiling of SQL queries and Fernet calls.
+
+ProfilingMiddleware profiles a sampled share of requests
+(REQUEST_PROFILING_SAMPLE_RATE): query count and time, repeated query
+signatures (the N+1 pattern), Fernet encrypt/decrypt calls and time, and the
+total time spent in the view and inner middleware. Each profile is logged as
+one JSON record on the "utils.profiling" logger and, with
+REQUEST_PROFILING_SERVER_TIMING, summarized in a Server-Timing header that
+the browser devtools display.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from utils import crypto_hooks
+
+logger = logging.getLogger(__name__)
+
+# Repeated query signatures included in a log record.
+MAX_DUPLICATES = 10
+
+_current = ContextVar("request_profile", default=None)
+
+# Collapse IN (%s, %s, ...) lists so that queries only differing by the
+# number of values share a signature.
+_placeholders = re.compile(r"%s(?:, %s)+")
+
+
+def signature(sql):
+    """
+    The shape of a query, without its parameters.
+    """
+    return _placeholders.sub("%s, ...", sql)
+
+
+class Profile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.signatures = Counter()
+        # {"encrypt"/"decrypt": [calls, seconds]}
+        self.crypto = {"encrypt": [0, 0.0], "decrypt": [0, 0.0]}
+        self.view_seconds = 0.0
+
+    def duplicates(self):
+        """
+        (signature, count) of the queries run more than once, most run first.
+        """
+        return [
+            (sql, count) for sql, count in self.signatures.most_common() if count > 1
+        ]
+
+    def as_dict(self):
+        duplicates = self.duplicates()
+        return {
+            "queries": self.queries,
+            "sql_ms": round(self.sql_seconds * 1000, 3),
+            "duplicate_queries": sum(count - 1 for _, count in duplicates),
+            "duplicates": [
+                {"sql": sql, "count": count}
+                for sql, count in duplicates[:MAX_DUPLICATES]
+            ],
+            **{
+                f"fernet_{operation}s": calls
+                for operation, (calls, _) in self.crypto.items()
+            },
+            **{
+                f"fernet_{operation}_ms": round(seconds * 1000, 3)
+                for operation, (_, seconds) in self.crypto.items()
+            },
+            "view_ms": round(self.view_seconds * 1000, 3),
+        }
+
+    def server_timing(self):
+        encrypts, encrypt_seconds = self.crypto["encrypt"]
+        decrypts, decrypt_seconds = self.crypto["decrypt"]
+        return ", ".join(
+            [
+                'db;dur=%.1f;desc="%d queries, %d repeated"'
+                % (
+                    self.sql_seconds * 1000,
+                    self.queries,
+                    sum(count - 1 for _, count in self.duplicates()),
+                ),
+                'fernet;dur=%.1f;desc="%d decrypt, %d encrypt"'
+                % ((encrypt_seconds + decrypt_seconds) * 1000, decrypts, encrypts),
+                "view;dur=%.1f" % (self.view_seconds * 1000),
+            ]
+        )
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting queries against the request being
+    profiled, if any. It stays installed on every connection: async views
+    query from another thread, with its own connections, but the same
+    context.
+    """
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_seconds += time.perf_counter() - started
+        profile.queries += 1
+        profile.signatures[signature(sql)] += 1
+
+
+def install(connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+connection_created.connect(install)
+
+
+def record_crypto(operation, field, seconds, error):
+    """
+    crypto_hooks callback counting Fernet calls against the request being
+    profiled, if any.
+    """
+    profile = _current.get()
+    if profile is not None and operation in profile.crypto:
+        stats = profile.crypto[operation]
+        stats[0] += 1
+        stats[1] += seconds
+
+
+crypto_hooks.add_callback(record_crypto)
+
+
+@contextmanager
+def profiling():
+    """
+    Profile the SQL queries and Fernet calls made inside the block.
+    """
+    # Connections opened before this module was imported.
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    profile = Profile()
+    token = _current.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.view_seconds = time.perf_counter() - started
+        _current.reset(token)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sampled share of requests, see the module docstring. Best kept
+    first in MIDDLEWARE so the queries of the other middleware (sessions,
+    authentication) are included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0)
+        self.server_timing = getattr(settings, "REQUEST_PROFILING_SERVER_TIMING", False)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with profiling() as profile:
+            response = self.get_response(request)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with profiling() as profile:
+            response = await self.get_response(request)
+        return self.report(request, response, profile)
+
+    def report(self, request, response, profile):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **profile.as_dict(),
+        }
+        logger.info(json.dumps(record), extra={"profile": record})
+        if self.server_timing:
+            response["Server-Timing"] = profile.server_timing()
+        return response
@@ -0,0 +1,128 @@
+"""
+In-process cache of small lookup tables (statuses, geographies, cities...).
+
+Each registered model is loaded whole on first use and kept until one of its
+rows is saved or deleted, so hot paths resolve ids and names without
+touching the database. Invalidation goes through post_save/post_delete, which
+QuerySet.update() and bulk_create() don't send: call invalidate() after
+changing reference data that way.
+
+Invalidating bumps a per-model version kept in Django's cache, which every
+process compares its copy against at most every CHECK_INTERVAL seconds, so
+an edit made through one worker reaches the others within that delay.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# Seconds a process uses its copy of a table before checking the shared
+# version again.
+CHECK_INTERVAL = 5
+
+
+class ReferenceData:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # {model: ("field", ...)} lookup fields per registered model
+        self._lookups = {}
+        # {model: (version, checked, {"pk": {value: obj}, "name": {...}, ...})}
+        self._tables = {}
+
+    def register(self, model, *lookups):
+        """
+        Cache `model`, indexed by pk and the unique fields in `lookups`.
+        """
+        self._lookups[model] = lookups
+        dispatch_uid = f"reference-data:{model._meta.label}"
+        post_save.connect(self._changed, model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(self._changed, model, weak=False, dispatch_uid=dispatch_uid)
+
+    def _version_key(self, model):
+        return "reference-data:%s:version" % model._meta.label_lower
+
+    def version(self, model):
+        """
+        Counter bumped every time the cached `model` table is invalidated, by
+        any process sharing Django's cache.
+        """
+        key = self._version_key(model)
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock so that an evicted counter never comes
+            # back at a value some process still has a copy for.
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def invalidate(self, model=None):
+        """
+        Drop the cached rows of `model`, or of every registered model, in
+        this process now and in the others at their next check.
+        """
+        with self._lock:
+            for model in [model] if model else list(self._lookups):
+                self._tables.pop(model, None)
+                try:
+                    cache.incr(self._version_key(model))
+                except ValueError:
+                    # Not in the cache: a new clock-based version is newer.
+                    self.version(model)
+
+    def _changed(self, sender, **kwargs):
+        self.invalidate(sender)
+        # A reload between the write and the commit would cache the row as
+        # it was before, so drop it again once the change is visible.
+        transaction.on_commit(lambda: self.invalidate(sender))
+
+    def _table(self, model):
+        with self._lock:
+            now = time.monotonic()
+            cached = self._tables.get(model)
+            if cached is not None:
+                version, checked, table = cached
+                if now - checked < CHECK_INTERVAL:
+                    return table
+                if self.version(model) == version:
+                    self._tables[model] = (version, now, table)
+                    return table
+            # Read before loading: a change in between reloads next time.
+            version = self.version(model)
+            objs = list(model._default_manager.all())
+            table = {"pk": {obj.pk: obj for obj in objs}}
+            for field in self._lookups[model]:
+                table[field] = {getattr(obj, field): obj for obj in objs}
+            self._tables[model] = (version, now, table)
+            return table
+
+    def all(self, model):
+        """
+        Every cached row of `model`, in the model's default ordering.
+        """
+        return list(self._table(model)["pk"].values())
+
+    def get(self, model, pk=None, **lookup):
+        """
+        Cached `model` instance by pk, or by one registered lookup field, e.g.
+        get(Geography, name="NS"). Raises model.DoesNotExist like
+        QuerySet.get(). The instance is shared: don't modify it.
+        """
+        if pk is not None:
+            field, value = "pk", pk
+        else:
+            ((field, value),) = lookup.items()
+        try:
+            return self._table(model)[field][value]
+        except KeyError:
+            raise model.DoesNotExist(
+                f"{model._meta.object_name} matching {field}={value!r} does not exist."
+            ) from None
+
+    def exists(self, model, pk):
+        return pk in self._table(model)["pk"]
+
+
+reference_data = ReferenceData()